@@ -0,0 +1,36 @@
+#! /usr/bin/env python3
+
+# Compares one by one conversion of tir.calendars with bulk APIs for every
+#  day of a large range of dates. Conversions are checked by tests/test_calendars.py.
+# Usage: python3 bench/bench_calendars.py [FIRST_GREGORIAN_YEAR LAST_GREGORIAN_YEAR]
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tir.calendars import *
+
+
+def main(first_year, last_year):
+    start = gregorian_to_jdn(first_year, 1, 1)
+    stop = gregorian_to_jdn(last_year + 1, 1, 1)
+    days = jdn_range(start, stop)
+    gregorian_dates = [gregorian for (_, gregorian, _) in days]
+    print('{} days from {} to {}'.format(len(days), first_year, last_year))
+    one_by_one = min(timeit.repeat(lambda: [convert(date, 'gregorian', 'jalali') for date in gregorian_dates]
+                                  ,number=1
+                                  ,repeat=3))
+    many = min(timeit.repeat(lambda: convert_many(gregorian_dates, 'gregorian', 'jalali'), number=1, repeat=3))
+    incremental = min(timeit.repeat(lambda: jdn_range(start, stop), number=1, repeat=3))
+    print('{:<32}{:>10.3f} us/day'.format('convert() gregorian->jalali', one_by_one / len(days) * 1e6))
+    print('{:<32}{:>10.3f} us/day'.format('convert_many() gregorian->jalali', many / len(days) * 1e6))
+    print('{:<32}{:>10.3f} us/day'.format('jdn_range() all three', incremental / len(days) * 1e6))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:
+        main(int(sys.argv[1]), int(sys.argv[2]))
+    else:
+        main(1800, 2200)
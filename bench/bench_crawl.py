@@ -0,0 +1,66 @@
+#! /usr/bin/env python3
+
+# Compares crawling pages of several months and parsing them one by one in
+#  one thread with crawl_months(), which fetches them concurrently and parses
+#  them in a pool of processes on a machine with several CPUs, from a local
+#  stand-in of time.ir (bench/server.py). With latency, most of speedup is of
+#  fetching concurrently; parsing scales with number of cores, and with one
+#  CPU it's about as fast as one by one (speedup is printed too).
+# Usage: python3 bench/bench_crawl.py [MONTHS [LATENCY_SECONDS [PROCESSES]]]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tir import *
+from server import FixtureServer
+
+
+TRANSFORMERS = {'dates':    find_dates
+               ,'calendar': find_calendar
+               ,'quote':    find_quote}
+
+
+def one_by_one(url, months):
+    request = Request(url=url)
+    try:
+        return [HTMLParser(request.get_month(year, month), TRANSFORMERS).parse()
+                for (year, month) in months]
+    finally:
+        request.close()
+
+
+def with_pool(url, months, processes):
+    return [transformed for (_, transformed) in crawl_months(months
+                                                            ,TRANSFORMERS
+                                                            ,url=url
+                                                            ,processes=processes)]
+
+
+def measure(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return (time.perf_counter() - start, result)
+
+
+def main(count, latency, processes):
+    months = [(1390 + (offset // 12), offset % 12 + 1) for offset in range(count)]
+    with FixtureServer(latency=latency) as server:
+        (sequential_time, result1) = measure(one_by_one, server.url, months)
+        (pool_time, result2) = measure(with_pool, server.url, months, processes)
+    assert result1 == result2
+    print('{} month pages, {:.0f} ms latency per request, {} CPUs'.format(count
+                                                                       ,latency * 1000
+                                                                       ,os.cpu_count()))
+    print('{:<28}{:>10.1f} ms'.format('one by one', sequential_time * 1000))
+    print('{:<28}{:>10.1f} ms'.format('crawl_months', pool_time * 1000))
+    print('{:<28}{:>10.2f} x'.format('speedup', sequential_time / pool_time))
+
+
+if __name__ == '__main__':
+    arguments = [int(sys.argv[1]) if len(sys.argv) > 1 else 96
+                ,float(sys.argv[2]) if len(sys.argv) > 2 else 0
+                ,int(sys.argv[3]) if len(sys.argv) > 3 else None]
+    main(*arguments)
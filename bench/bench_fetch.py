@@ -0,0 +1,60 @@
+#! /usr/bin/env python3
+
+# Compares fetching pages of several months one by one with Request and at
+#  once with AsyncRequest, from a local stand-in of time.ir (bench/server.py)
+#  which answers each request after a latency.
+# Usage: python3 bench/bench_fetch.py [LATENCY_SECONDS [MONTHS [CONCURRENCY]]]
+
+import os
+import sys
+import time
+import asyncio
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tir import *
+from server import FixtureServer
+
+
+def one_by_one(url, months):
+    request = Request(url=url)
+    try:
+        return [request._get('/fa/main?year={}&month={}'.format(year, month)).text
+                for (year, month) in months]
+    finally:
+        request.close()
+
+
+def at_once(url, months, concurrency):
+    request = AsyncRequest(url=url, concurrency=concurrency)
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(request.get_months(months))
+    finally:
+        loop.close()
+        request.close()
+
+
+def measure(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return (time.perf_counter() - start, result)
+
+
+def main(latency, count, concurrency):
+    months = [(1397 + (offset // 12), offset % 12 + 1) for offset in range(count)]
+    with FixtureServer(latency=latency) as server:
+        (sequential_time, pages1) = measure(one_by_one, server.url, months)
+        (concurrent_time, pages2) = measure(at_once, server.url, months, concurrency)
+    assert pages1 == pages2
+    print('{} month pages, {:.0f} ms latency per request'.format(count, latency * 1000))
+    print('{:<28}{:>10.1f} ms'.format('Request (one by one)', sequential_time * 1000))
+    print('{:<28}{:>10.1f} ms'.format('AsyncRequest ({} at once)'.format(concurrency), concurrent_time * 1000))
+    print('{:<28}{:>10.2f} x'.format('speedup', sequential_time / concurrent_time))
+
+
+if __name__ == '__main__':
+    arguments = [float(sys.argv[1]) if len(sys.argv) > 1 else 0.05
+                ,int(sys.argv[2]) if len(sys.argv) > 2 else 12
+                ,int(sys.argv[3]) if len(sys.argv) > 3 else 4]
+    main(*arguments)
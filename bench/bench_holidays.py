@@ -0,0 +1,56 @@
+#! /usr/bin/env python3
+
+# Compares answering "working days between two dates" by reading months of a
+#  calendar store (computed calendars of YEARS years, in a temporary file)
+#  with binary search in a HolidayIndex of same store.
+# Usage: python3 bench/bench_holidays.py [YEARS [NUMBER]]
+
+import os
+import sys
+import timeit
+import datetime
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tir import *
+
+
+def scan_store(store, start, stop):
+    # working days of months in store from start to stop
+    days = 0
+    for (year, month) in solar_months(start, stop):
+        for day in store.month(year, month):
+            if day.is_disabled:
+                continue
+            date = datetime.date(*convert((year, month, int(day.solar)), 'jalali', 'gregorian'))
+            if start <= date <= stop and not day.is_holiday:
+                days += 1
+    return days
+
+
+def main(years, number):
+    directory = tempfile.mkdtemp()
+    store = CalendarStore(os.path.join(directory, 'calendar'))
+    for year in range(1400, 1400 + years):
+        for month in range(1, 13):
+            store.put(year, month, solar_calendar(year, month))
+    index = HolidayIndex.load(store, os.path.join(directory, 'holidays'))
+    start = datetime.date(*convert((1400, 1, 10), 'jalali', 'gregorian'))
+    stop = datetime.date(*convert((1400 + years - 1, 12, 20), 'jalali', 'gregorian'))
+    assert scan_store(store, start, stop) == index.working_days_between(start, stop)
+    scan = min(timeit.repeat(lambda: scan_store(store, start, stop), number=number, repeat=5)) / number
+    indexed = min(timeit.repeat(lambda: index.working_days_between(start, stop), number=number, repeat=5)) / number
+    load = min(timeit.repeat(lambda: HolidayIndex.load(store, os.path.join(directory, 'holidays'))
+                            ,number=number
+                            ,repeat=5)) / number
+    print('working days of {} years ({} holidays in index)'.format(years, len(index)))
+    print('  {:<22}{:>12.1f} us'.format('reading store', scan * 1e6))
+    print('  {:<22}{:>12.1f} us'.format('HolidayIndex', indexed * 1e6))
+    print('  {:<22}{:>12.1f} us'.format('HolidayIndex.load', load * 1e6))
+    print('  {:<22}{:>12.0f} x'.format('speedup', scan / indexed))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10
+        ,int(sys.argv[2]) if len(sys.argv) > 2 else 20)
@@ -0,0 +1,124 @@
+#! /usr/bin/env python3
+
+# Compares rendering a calendar by resolving theme of each fragment with
+#  if/elif chains (how DrawCalendar of bin/crawler.py drew it) with compiled
+#  theme tables of tir.render, for grids of 35 and 42 days.
+# Usage: python3 bench/bench_render.py [NUMBER]
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tir import *
+
+
+THEME = CalendarTheme(disabled   = ('\033[1;30m', '\033[0m')
+                     ,holiday    = ('\033[1;31m', '\033[0m')
+                     ,today      = ('\033[1;32m', '\033[0m')
+                     ,normal     = ('\033[1;37m', '\033[0m')
+                     ,solar      = ('\033[1;32m', '\033[0m')
+                     ,other_days = ('\033[0;37m', '\033[0m'))
+
+# per-fragment dispatch which was used by DrawCalendar, writing to a list
+#  instead of terminal:
+
+def legacy_render_calendar(days, theme):
+    parts = []
+
+    def _print(text, _type='n'):
+        if theme and _type:
+            if _type == 'h':
+                (start, stop) = theme.holiday
+            elif _type == 't':
+                (start, stop) = theme.today
+            elif _type == 'd':
+                (start, stop) = theme.disabled
+            elif _type == 's':
+                (start, stop) = theme.solar
+            elif _type == 'o':
+                (start, stop) = theme.other_days
+            else: # _type == 'n'
+                (start, stop) = theme.normal
+            text = start + text + stop
+        parts.append(text)
+
+    def frame_type(day):
+        if day.is_today:
+            return 't'
+        elif day.is_disabled:
+            return 'd'
+        elif day.is_holiday:
+            return 'h'
+        return 'n'
+
+    _print(' ________  ________  ________  ________  ________  ________ ', 'n')
+    _print(' ________\n', 'h')
+    _print('| Shanbe ||  Yek   ||   Do   ||   Se   || Chahar ||  Panj  |', 'n')
+    _print('| Jom\'eh |\n', 'h')
+    count = 42 if len(days) == 42 else 35
+    for offset in range(0, count, 7):
+        week = days[offset:offset + 7]
+        for day in week:
+            _print(' ' + ('_' * 8) + ' ', frame_type(day))
+        _print('\n', None)
+        for day in week:
+            _print('|' + (' ' * 8) + '|', frame_type(day))
+        _print('\n', None)
+        for day in week:
+            if day.is_today and day.is_holiday:
+                (type1, type2) = ('t', 'h')
+            elif day.is_today:
+                (type1, type2) = ('t', 's')
+            elif day.is_disabled and day.is_holiday:
+                (type1, type2) = ('d', 'h')
+            elif day.is_disabled:
+                (type1, type2) = ('d', 'd')
+            elif day.is_holiday:
+                (type1, type2) = ('h', 'h')
+            else:
+                (type1, type2) = ('n', 'n')
+            _print('|   ', type1)
+            _print(day.solar, type2)
+            _print('   |', type1)
+        _print('\n', None)
+        for day in week:
+            if day.is_today:
+                (type1, type2) = ('o', 't')
+            elif day.is_disabled:
+                (type1, type2) = ('d', 'd')
+            elif day.is_holiday:
+                (type1, type2) = ('o', 'h')
+            else:
+                (type1, type2) = ('o', 'n')
+            _print('| ', type2)
+            _print(day.qamari, type1)
+            _print('  ')
+            _print(day.gregorian, type1)
+            _print(' |', type2)
+        _print('\n', None)
+        for day in week:
+            _print('|' + ('_' * 8) + '|', frame_type(day))
+        _print('\n', None)
+    return ''.join(parts)
+
+
+def measure(function, days, number):
+    return min(timeit.repeat(lambda: function(days, THEME), number=number, repeat=5)) / number
+
+
+def main(number):
+    for (year, month) in ((1397, 8), (1397, 6)):
+        days = solar_calendar(year, month, today=9)
+        assert legacy_render_calendar(days, THEME) == render_calendar(days, THEME)
+        legacy = measure(legacy_render_calendar, days, number)
+        compiled = measure(render_calendar, days, number)
+        print('{} days ({}/{:02d})'.format(len(days), year, month))
+        print('  {:<22}{:>10.1f} us'.format('if/elif dispatch', legacy * 1e6))
+        print('  {:<22}{:>10.1f} us'.format('compiled theme', compiled * 1e6))
+        print('  {:<22}{:>10.2f} x'.format('speedup', legacy / compiled))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,122 @@
+#! /usr/bin/env python3
+
+# Compares per-page lookup cost of old recursive search() walk with compiled
+#  selectors answered from SelectorIndex.
+# Usage: python3 bench/bench_selector.py [path/to/page.html]
+
+import os
+import sys
+import timeit
+import lxml.html
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tir import *
+
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'time.ir.html')
+
+# recursive walk which was used by search() before SelectorIndex:
+
+def legacy_search(element, tag, attr, val):
+    def _has_attr(sub_element):
+        for attr2, val2 in sub_element.attrib.items():
+            if type(attr) == tuple and type(val) == tuple:
+                if attr2.find(attr[0]) != -1 and val2.find(val[0]) != -1:
+                    return True
+            elif type(attr) == tuple:
+                if attr2.find(attr[0]) != -1 and val2 == val:
+                    return True
+            elif type(val) == tuple:
+                if attr2 == attr and val2.find(val[0]) != -1:
+                    return True
+            else:
+                if attr2 == attr and val2 == val:
+                    return True
+        return False
+
+    def _search(element, tag, attr, val):
+        for sub_element in element.getchildren():
+            if sub_element.tag == tag:
+                if attr == None:
+                    return sub_element
+                if _has_attr(sub_element):
+                    return sub_element
+            result = _search(sub_element, tag, attr, val)
+            if result == None:
+                continue
+            return result
+        return None
+
+    return _search(element, tag, attr, val)
+
+
+def legacy_lookups(html):
+    top = legacy_search(html.body, 'div', 'class', 'topWrapper')
+    date = legacy_search(top, 'div', 'class', ('todayDate',))
+    rows = legacy_search(date, 'div', 'class', 'row')
+    for _type in ('shamsi', 'gregorian'):
+        row = legacy_search(rows, 'div', 'class', ('today-' + _type,))
+        legacy_search(row, 'span', 'class', 'show date')
+        legacy_search(row, 'span', 'class', 'show numeral')
+    top = legacy_search(html.body, 'div', 'class', 'topWrapper')
+    element = legacy_search(top, 'div', 'class', ('calendarWrapper',))
+    element = legacy_search(element, 'div', 'id', ('CalendarContainer',))
+    element = legacy_search(element, 'div', 'class', 'eventCalendar')
+    element = legacy_search(element, 'div', 'class', 'mainCalendar')
+    day_list = legacy_search(element, 'div', 'class', 'dayList')
+    for day in day_list.getchildren():
+        if day.tag == 'br':
+            continue
+        info = day.getchildren()[0]
+        for _type in ('jalali', 'miladi', 'qamari'):
+            legacy_search(info, 'div', 'class', (_type,))
+    top = legacy_search(html.body, 'div', 'class', 'topWrapper')
+    quote = legacy_search(top, 'div', 'class', 'randomQuote')
+    legacy_search(quote, 'a', 'class', ('quoteAuthor',))
+    legacy_search(quote, 'span', 'class', ('quoteText',))
+
+
+def indexed_lookups(html):
+    # a fresh index for each run, so its build cost is counted too:
+    index = SelectorIndex(html)
+    top = index.find(TOP_WRAPPER)
+    date = index.find(TODAY_DATE, top)
+    rows = index.find(DATE_ROWS, date)
+    for _type in ('shamsi', 'gregorian'):
+        row = index.find(DATE_ROW[_type], rows)
+        index.find(DATE_TEXT, row)
+        index.find(DATE_NUMERAL, row)
+    element = index.find(CALENDAR_WRAPPER, top)
+    element = index.find(CALENDAR_CONTAINER, element)
+    element = index.find(EVENT_CALENDAR, element)
+    element = index.find(MAIN_CALENDAR, element)
+    day_list = index.find(DAY_LIST, element)
+    for day in day_list:
+        if day.tag == 'br':
+            continue
+        info = day[0]
+        for selector in (DAY_JALALI, DAY_MILADI, DAY_QAMARI):
+            index.find(selector, info)
+    quote = index.find(RANDOM_QUOTE, top)
+    index.find(QUOTE_AUTHOR, quote)
+    index.find(QUOTE_TEXT, quote)
+
+
+def measure(function, html, number):
+    return min(timeit.repeat(lambda: function(html), number=number, repeat=5)) / number
+
+
+def main(path):
+    html = lxml.html.fromstring(open(path, encoding='utf-8').read())
+    number = 50
+    legacy = measure(legacy_lookups, html, number)
+    indexed = measure(indexed_lookups, html, number)
+    print('page: {}'.format(path))
+    print('{:<24}{:>12.3f} ms'.format('recursive search()', legacy * 1000))
+    print('{:<24}{:>12.3f} ms'.format('SelectorIndex', indexed * 1000))
+    print('{:<24}{:>12.2f} x'.format('speedup', legacy / indexed))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else FIXTURE)
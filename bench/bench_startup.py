@@ -0,0 +1,94 @@
+#! /usr/bin/env python3
+
+# Measures startup of bin/crawler.py in new interpreters, which is most of the
+#  runtime of a tir command:
+#   cold: no cache, page is fetched from bench/server.py and parsed
+#   warm: cache of today exists, nothing is fetched or parsed
+# For each run it reports wall time and import time of modules which
+#  `python -X importtime` reports, and slowest imports of warm run.
+# Usage: python3 bench/bench_startup.py [RUNS]
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+
+from server import FixtureServer
+
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+CRAWLER = os.path.join(ROOT, 'bin', 'crawler.py')
+ARGUMENTS = ['-q', '-H', '--no-daemon']
+
+# runs crawler against the local server instead of time.ir:
+RUNNER = '''
+import sys
+sys.argv = [{crawler!r}] + {arguments!r}
+import tir.tir
+defaults = list(tir.tir.Request.__init__.__defaults__)
+defaults[0] = {url!r}
+tir.tir.Request.__init__.__defaults__ = tuple(defaults)
+exec(compile(open({crawler!r}).read(), {crawler!r}, 'exec'), {{'__name__': '__main__'}})
+'''
+
+
+def run(url, home):
+    runner = RUNNER.format(crawler=CRAWLER, arguments=ARGUMENTS, url=url)
+    environment = dict(os.environ, HOME=home, PYTHONPATH=ROOT)
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', runner]
+                            ,stdout=subprocess.DEVNULL
+                            ,stderr=subprocess.PIPE
+                            ,env=environment
+                            ,universal_newlines=True)
+    wall_time = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr)
+    return (wall_time, import_times(process.stderr))
+
+
+def import_times(report):
+    # {top level module: cumulative microseconds}
+    times = {}
+    for line in report.splitlines():
+        if not line.startswith('import time:') or line.endswith('package'):
+            continue
+        (_, cumulative, name) = line[len('import time:'):].split('|')
+        if name.startswith('  '): # imported by another module
+            continue
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main(runs):
+    home = tempfile.mkdtemp()
+    results = {'cold': [], 'warm': []}
+    try:
+        with FixtureServer(latency=0) as server:
+            for _ in range(runs):
+                shutil.rmtree(os.path.join(home, '.cache'), ignore_errors=True)
+                results['cold'].append(run(server.url, home))
+                results['warm'].append(run(server.url, home))
+    finally:
+        shutil.rmtree(home)
+    print('{:<8}{:>12}{:>14}'.format('', 'wall', 'imports'))
+    for name in ('cold', 'warm'):
+        wall_time = median([wall_time for (wall_time, _) in results[name]])
+        imports = median([sum(times.values()) for (_, times) in results[name]])
+        print('{:<8}{:>9.1f} ms{:>11.1f} ms'.format(name, wall_time * 1000, imports / 1000))
+    print()
+    print('slowest imports of warm run:')
+    times = results['warm'][-1][1]
+    for name in sorted(times, key=times.get, reverse=True)[:10]:
+        print('  {:<30}{:>8.1f} ms'.format(name, times[name] / 1000))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
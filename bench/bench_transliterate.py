@@ -0,0 +1,150 @@
+#! /usr/bin/env python3
+
+# Compares throughput of old per-character transliteration of farsi numbers,
+#  months and weekdays with translation tables of tir, and bulk
+#  transform_numbers() for numbers of a year of calendar cells.
+# Usage: python3 bench/bench_transliterate.py [NUMBER]
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tir import *
+
+# functions which were used before translation tables:
+
+def legacy_transform_number(number):
+    number2 = ''
+    for char in number:
+        unicode_number = ord(char)
+        if 1775 < unicode_number < 1786: # ۰-۹ farsi
+            number2 += chr(unicode_number - 1728)
+            continue
+        if 1631 < unicode_number < 1642: # ۰-۹ arabic
+            number2 += chr(unicode_number - 1584)
+            continue
+        if 47 < ord(char) < 58: # 0-9
+            number2 += char
+            continue
+        raise ValueError('unknown farsi number {!r}'.format(number))
+    if len(number2) == 1:
+        number2 = '0' + number2
+    return number2
+
+
+def legacy_transform_month(month):
+    if len(month) < 2:
+        raise ValueError('unknown solar-hijri month {!r}'.format(month))
+    farsi_month_table = [('Farvardin',   (1601, None))
+                        ,('Ordibehesht', (1575, 1585))
+                        ,('Khordad',     (1582, None))
+                        ,('Tir',         (1578, None))
+                        ,('Mordad',      (1605, 1585))
+                        ,('Mordad',      (1575, 1614))
+                        ,('Shahrivar',   (1588, None))
+                        ,('Mehr',        (1605, 1607))
+                        ,('Aban',        (1575, 1576))
+                        ,('Azar',        (1575, 1584))
+                        ,('Dey',         (1583, None))
+                        ,('Bahman',      (1576, None))
+                        ,('Esfand',      (1575, 1587))]
+    (char1_number, char2_number) = (ord(month[0]), ord(month[1]))
+    if char1_number == 1570:
+        char1_number = 1575
+    for name, char_numbers in farsi_month_table:
+        if char_numbers[0] == char1_number:
+            if (not char_numbers[1] or char_numbers[1] == char2_number):
+                return name
+    raise ValueError('unknown solar month {!r}'.format(month))
+
+
+def legacy_transform_weekday(weekday):
+    if len(weekday) < 4:
+        raise ValueError('unknown weekday {!r}'.format(weekday))
+    farsi_weekdays_table = [('Shanbeh',   1588)
+                           ,('1-Shanbeh', 1740)
+                           ,('2-Shanbeh', 1583)
+                           ,('3-Shanbeh', 1587)
+                           ,('4-Shanbeh', 1670)
+                           ,('5-Shanbeh', 1662)
+                           ,('Jom\'eh',   1580)]
+    weekday_char1_unicode_number = ord(weekday[0])
+    for farsi_weekday, char1_unicode_number in farsi_weekdays_table:
+        if weekday_char1_unicode_number == char1_unicode_number:
+            return farsi_weekday
+    raise ValueError('unknown weekday {!r}'.format(weekday))
+
+
+def legacy_is_a_to_z(data):
+    for char in data:
+        number = ord(char)
+        if 96 < number < 123:
+            continue
+        if 64 < number < 91:
+            continue
+        return False
+    return True
+
+
+FARSI_DIGITS = '۰۱۲۳۴۵۶۷۸۹'
+MONTHS = ['فروردین', 'اردیبهشت', 'خرداد', 'تیر', 'مرداد', 'شهریور'
+         ,'مهر', 'آبان', 'آذر', 'دی', 'بهمن', 'اسفند']
+WEEKDAYS = ['شنبه', 'یکشنبه', 'دوشنبه', 'سه شنبه', 'چهارشنبه', 'پنجشنبه', 'جمعه']
+WORDS = ['Wednesday', 'October', 'Autumn', 'چهارشنبه']
+
+
+def farsi(number):
+    return ''.join([FARSI_DIGITS[int(digit)] for digit in str(number)])
+
+
+def year_of_numbers():
+    # three numbers of each cell of 12 months
+    numbers = []
+    for month in range(1, 13):
+        for day in solar_calendar(1397, month):
+            numbers.extend([farsi(int(day.solar)), farsi(int(day.gregorian)), farsi(int(day.qamari))])
+    return numbers
+
+
+def measure(function, number):
+    return min(timeit.repeat(function, number=number, repeat=5)) / number
+
+
+def report(name, count, legacy, new):
+    print('{:<22}{:>10.2f} M/s{:>10.2f} M/s{:>9.2f} x'.format(name
+                                                           ,count / legacy / 1e6
+                                                           ,count / new / 1e6
+                                                           ,legacy / new))
+
+
+def main(number):
+    numbers = year_of_numbers()
+    assert [legacy_transform_number(item) for item in numbers] == transform_numbers(numbers)
+    assert [legacy_transform_month(item) for item in MONTHS] == [transform_month(item) for item in MONTHS]
+    print('{:<22}{:>14}{:>14}{:>11}'.format('', 'legacy', 'tables', 'speedup'))
+    report('transform_number'
+          ,len(numbers)
+          ,measure(lambda: [legacy_transform_number(item) for item in numbers], number)
+          ,measure(lambda: [transform_number(item) for item in numbers], number))
+    report('transform_numbers'
+          ,len(numbers)
+          ,measure(lambda: [legacy_transform_number(item) for item in numbers], number)
+          ,measure(lambda: transform_numbers(numbers), number))
+    report('transform_month'
+          ,len(MONTHS) * 100
+          ,measure(lambda: [legacy_transform_month(item) for item in MONTHS * 100], number)
+          ,measure(lambda: [transform_month(item) for item in MONTHS * 100], number))
+    report('transform_weekday'
+          ,len(WEEKDAYS) * 100
+          ,measure(lambda: [legacy_transform_weekday(item) for item in WEEKDAYS * 100], number)
+          ,measure(lambda: [transform_weekday(item) for item in WEEKDAYS * 100], number))
+    report('is_a_to_z'
+          ,len(WORDS) * 100
+          ,measure(lambda: [legacy_is_a_to_z(item) for item in WORDS * 100], number)
+          ,measure(lambda: [is_a_to_z(item) for item in WORDS * 100], number))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
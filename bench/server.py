@@ -0,0 +1,74 @@
+# A local stand-in for time.ir which serves recorded pages of bench/fixtures
+#  with an artificial latency, so fetching can be measured without network.
+# Every path is answered with fixtures/time.ir.html unless a fixture with
+#  same name as path exists (e.g. fixtures/fa/main for '/fa/main').
+# latencies maps paths to their own latency, e.g. {'/': 2} for a slow main
+#  page.
+#
+#   with FixtureServer(latency=0.05) as server:
+#       Request(url=server.url).get()
+
+import os
+import time
+import threading
+import http.server
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+class FixtureServer:
+
+    def __init__(self, latency=0.05, fixtures=FIXTURES, port=0, latencies=None):
+        self.latency = latency
+        self.latencies = latencies or {}
+        self.fixtures = fixtures
+        self.port = port
+        self.requests = [] # requested paths
+        self.server = None
+        self.url = None
+
+
+    def __enter__(self):
+        fixture_server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                fixture_server.requests.append(self.path)
+                time.sleep(fixture_server.latencies.get(self.path, fixture_server.latency))
+                body = fixture_server.body(self.path)
+                self.send_response(200)
+                self.send_header('content-type', 'text/html; charset=utf-8')
+                self.send_header('content-length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+            def handle_error(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', self.port), Handler)
+        self.server.daemon_threads = True
+        self.server.handle_error = lambda *args: None
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = 'http://127.0.0.1:{}'.format(self.server.server_address[1])
+        return self
+
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+    def body(self, path):
+        path = path.split('?')[0].strip('/')
+        file_path = os.path.join(self.fixtures, path)
+        if not path or not os.path.isfile(file_path):
+            file_path = os.path.join(self.fixtures, 'time.ir.html')
+        with open(file_path, 'rb') as fixture:
+            return fixture.read()
@@ -0,0 +1,168 @@
+#! /usr/bin/env python3
+
+# Benchmark suite of parsing and rendering hot paths, run against recorded
+#  pages of bench/fixtures: main page of time.ir (time.ir.html) and its
+#  '/fa/main' variant (fa/main).
+# Each case is timed with timeit (best of 7 repeats) and compared with
+#  bench/baselines.json, which is made by --save on a reference machine, so
+#  compare results of same machine only, and re-run a case which is marked
+#  slower on a busy machine before trusting it.
+#
+# Usage: python3 bench/suite.py [--save] [--check] [--filter TEXT]
+#  --save     stores results as new baselines
+#  --check    exits with 1 if a case is slower than its baseline by more
+#             than --tolerance (default 0.25, i.e. 25%)
+#  --filter   runs cases which their name contains TEXT
+
+import os
+import sys
+import json
+import timeit
+from optparse import OptionParser
+
+BENCH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH, '..'))
+
+from tir import *
+
+
+FIXTURES = {'main':    os.path.join(BENCH, 'fixtures', 'time.ir.html')
+           ,'fa/main': os.path.join(BENCH, 'fixtures', 'fa', 'main')}
+BASELINES = os.path.join(BENCH, 'baselines.json')
+TRANSFORMERS = {'dates':    find_dates
+               ,'calendar': find_calendar
+               ,'quote':    find_quote}
+THEME = CalendarTheme(disabled   = ('\033[1;30m', '\033[0m')
+                     ,holiday    = ('\033[1;31m', '\033[0m')
+                     ,today      = ('\033[1;32m', '\033[0m')
+                     ,normal     = ('\033[1;37m', '\033[0m')
+                     ,solar      = ('\033[1;32m', '\033[0m')
+                     ,other_days = ('\033[0;37m', '\033[0m'))
+
+
+def chunks(data, size=8192):
+    return [data[offset:offset + size] for offset in range(0, len(data), size)]
+
+
+def page_cases(name, path):
+    # {case name: function} for a fixture
+    with open(path, encoding='utf-8') as fixture:
+        text = fixture.read()
+    data = text.encode('utf-8')
+    html = HTMLParser(text, TRANSFORMERS).html
+    transformed = HTMLParser(text, TRANSFORMERS).parse()
+    top = search(html, 'div', 'class', 'topWrapper')
+    parser = StreamingHTMLParser(iter(chunks(data)), TRANSFORMERS, SUBTREES)
+    parsed = parser.parse()
+    previous = {name: (digest, parsed[name]) for (name, digest) in parser.hashes.items()}
+    return {'{}/HTMLParser.parse'.format(name):
+                lambda: HTMLParser(text, TRANSFORMERS).parse()
+           ,'{}/StreamingHTMLParser.parse'.format(name):
+                lambda: StreamingHTMLParser(iter(chunks(data)), TRANSFORMERS, SUBTREES).parse()
+           ,'{}/StreamingHTMLParser.parse (unchanged)'.format(name):
+                lambda: StreamingHTMLParser(iter(chunks(data)), TRANSFORMERS, SUBTREES, previous=previous).parse()
+           ,'{}/find_dates'.format(name):
+                lambda: find_dates(html)
+           ,'{}/find_calendar'.format(name):
+                lambda: find_calendar(html)
+           ,'{}/find_quote'.format(name):
+                lambda: find_quote(html)
+           ,'{}/search'.format(name):
+                lambda: (search(html, 'div', 'class', 'topWrapper')
+                        ,search(top, 'div', 'class', 'dayList')
+                        ,search(top, 'span', 'class', ('quoteText',)))
+           ,'{}/render_calendar'.format(name):
+                lambda: render_calendar(transformed['calendar'], THEME)}
+
+
+def transform_cases():
+    numbers = ['۱', '۲۳', '٩', '۱۳۹۷', '31', '۰۸'] * 20
+    months = ['فروردین', 'اردیبهشت', 'مرداد', 'آبان', 'آذر', 'اسفند']
+    return {'transform_number':
+                lambda: [transform_number(number) for number in numbers]
+           ,'transform_numbers':
+                lambda: transform_numbers(numbers)
+           ,'transform_month':
+                lambda: [transform_month(month) for month in months]
+           ,'transform_weekday':
+                lambda: transform_weekday('چهارشنبه')
+           ,'transform_date':
+                lambda: (transform_date('چهارشنبه - ۹ آبان ۱۳۹۷')
+                        ,transform_date('Wednesday - 2018 31 October'))
+           ,'transform_numeral_date':
+                lambda: (transform_numeral_date('۱۳۹۷/۰۸/۰۹')
+                        ,transform_numeral_date('2018-10-31'))}
+
+
+def cases():
+    result = {}
+    for name, path in FIXTURES.items():
+        result.update(page_cases(name, path))
+    result.update(transform_cases())
+    return result
+
+
+def measure(function, duration=0.02, repeat=7):
+    # seconds of one call, best of repeats which each take about duration
+    timer = timeit.Timer(function)
+    number = 1
+    while timer.timeit(number) < duration:
+        number *= 2
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def format_time(seconds):
+    if seconds >= 1e-3:
+        return '{:.3f} ms'.format(seconds * 1e3)
+    return '{:.2f} us'.format(seconds * 1e6)
+
+
+def main():
+    op = OptionParser(usage='%prog [--save] [--check] [--filter TEXT]')
+    op.add_option('--save', action='store_true', default=False)
+    op.add_option('--check', action='store_true', default=False)
+    op.add_option('--filter', default='')
+    op.add_option('--tolerance', type='float', default=0.25)
+    opts = op.parse_args()[0]
+    baselines = {}
+    if os.path.exists(BASELINES):
+        with open(BASELINES) as baselines_file:
+            baselines = json.load(baselines_file)
+    results = {}
+    slower = []
+    print('{:<48}{:>14}{:>14}{:>10}'.format('case', 'baseline', 'now', 'ratio'))
+    for name, function in sorted(cases().items()):
+        if opts.filter not in name:
+            continue
+        seconds = measure(function)
+        results[name] = seconds
+        baseline = baselines.get(name)
+        if baseline == None:
+            print('{:<48}{:>14}{:>14}'.format(name, '-', format_time(seconds)))
+            continue
+        ratio = seconds / baseline
+        mark = ''
+        if ratio > 1 + opts.tolerance:
+            mark = '  slower'
+            slower.append(name)
+        elif ratio < 1 - opts.tolerance:
+            mark = '  faster'
+        print('{:<48}{:>14}{:>14}{:>10.2f}{}'.format(name
+                                                   ,format_time(baseline)
+                                                   ,format_time(seconds)
+                                                   ,ratio
+                                                   ,mark))
+    if opts.save:
+        baselines.update(results)
+        with open(BASELINES, 'w') as baselines_file:
+            json.dump(baselines, baselines_file, indent=1, sort_keys=True)
+            baselines_file.write('\n')
+        print('\nsaved {} baselines in {}'.format(len(results), BASELINES))
+    if opts.check and slower:
+        print('\n{} cases are slower than their baselines'.format(len(slower)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,23 +1,69 @@
 #! /usr/bin/env python3
 
+import sys
+
+# When a tir daemon is running (see --daemon option), it answers with rendered
+#  output and there is no need to import or parse anything else.
+# Request is arguments separated by null character, response is status code
+#  and output, or '-' if daemon can not handle that request.
+
+def ask_daemon(arguments):
+    import os
+    socket_path = os.path.expanduser('~/.cache/.tir_socket')
+    for offset, argument in enumerate(arguments):
+        if argument in ('--daemon', '--no-daemon', '--profile') or argument.startswith('--profile-file'):
+            return
+        if is_help(argument): # help is printed by this process
+            return
+        if argument == '--socket' and offset + 1 < len(arguments):
+            socket_path = arguments[offset + 1]
+        elif argument.startswith('--socket='):
+            socket_path = argument[len('--socket='):]
+    if not os.path.exists(socket_path):
+        return
+    import socket
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(2)
+    try:
+        client.connect(socket_path)
+        client.sendall('\0'.join(arguments).encode('utf-8'))
+        client.shutdown(socket.SHUT_WR)
+        response = b''.join(iter(lambda: client.recv(65536), b''))
+    except OSError:
+        return
+    finally:
+        client.close()
+    if not response or response[:1] == b'-':
+        return
+    sys.stdout.write(response[1:].decode('utf-8'))
+    sys.stdout.flush()
+    sys.exit(int(response[:1]))
+
+def is_help(argument):
+    # -h, --help or its abbreviations, or -h in a group of short options
+    if argument.startswith('--'):
+        return len(argument) > 3 and '--help'.startswith(argument)
+    return argument.startswith('-') and 'h' in argument
+
+ask_daemon(sys.argv[1:])
+
 import logging
 
 logging.basicConfig(level=logging.ERROR, format='%(levelname)-2s: %(message)s')
 logger = logging.getLogger(__name__)
 
-import sys
-
+import time
+import_started = time.perf_counter()
 try:
     from tir import *
 except ImportError:
     logger.error('could not found \'tir\' Python package installed on this system')
     sys.exit(1)
 
-import subprocess
-import traceback
+# modules which are only needed in some paths (e.g. subprocess for
+#  notifications, traceback for errors) are imported there:
 from optparse import OptionParser
 import datetime
-from pathlib import Path
 import os
 
 
@@ -78,6 +124,17 @@ op.add_option('-a'
              ,dest='about'
              ,const=True
              ,default=False)
+op.add_option('-f'
+             ,'--format'
+             ,help='writes data as text (default), json, ndjson (a record of'
+                   ' dates, time, each day of calendar or quote per line) or csv'
+                   ' (a row per record), and does not notify for other formats'
+                   ' than text'
+             ,action='store'
+             ,type='choice'
+             ,choices=('text', 'json', 'ndjson', 'csv')
+             ,dest='format'
+             ,default='text')
 op.add_option('-u'
              ,'--update-cache'
              ,help='if cache data exists, updates its data'
@@ -85,294 +142,87 @@ op.add_option('-u'
              ,dest='update_cache'
              ,const=True
              ,default=False)
+op.add_option('-m'
+             ,'--month'
+             ,help='shows calendar of solar month YEAR/MONTH (e.g. 1397/08) from'
+                   ' calendars which were fetched before, or all months of YEAR'
+                   ' and exits'
+             ,action='store'
+             ,dest='month'
+             ,default=None)
+op.add_option('--crawl'
+             ,help='fetches calendars of solar months FROM-TO (e.g. 1390/01-1397/12, or'
+                   ' years 1390-1397) from time.ir for --month option and exits'
+             ,action='store'
+             ,dest='crawl'
+             ,default=None)
+op.add_option('--connect-timeout'
+             ,help='seconds to wait for connecting to time.ir (default: 5)'
+             ,action='store'
+             ,type='float'
+             ,dest='connect_timeout'
+             ,default=5)
+op.add_option('--read-timeout'
+             ,help='seconds to wait for each part of time.ir page (default: 10)'
+             ,action='store'
+             ,type='float'
+             ,dest='read_timeout'
+             ,default=10)
+op.add_option('--daemon'
+             ,help='keeps today\'s data in memory and answers other tir commands'
+                   ' over a Unix socket'
+             ,action='store_const'
+             ,dest='daemon'
+             ,const=True
+             ,default=False)
+op.add_option('--no-daemon'
+             ,help='does not ask running daemon'
+             ,action='store_const'
+             ,dest='no_daemon'
+             ,const=True
+             ,default=False)
+op.add_option('--socket'
+             ,help='path of daemon\'s Unix socket (default: ~/.cache/.tir_socket)'
+             ,action='store'
+             ,dest='socket'
+             ,default=os.path.expanduser('~/.cache/.tir_socket'))
+op.add_option('--profile'
+             ,help='shows time of each stage (fetch, parse, cache, render, ...) after output'
+             ,action='store_const'
+             ,dest='profile'
+             ,const=True
+             ,default=False)
+op.add_option('--profile-file'
+             ,help='appends time of each stage to PROFILE_FILE as a line of JSON'
+             ,action='store'
+             ,dest='profile_file'
+             ,default=None)
+op.add_option('--max-stale'
+             ,help='days which cached data of an earlier day is shown while it'
+                   ' is updated in background, 0 waits for time.ir (default: 1)'
+             ,action='store'
+             ,type='int'
+             ,dest='max_stale'
+             ,default=1)
+op.add_option('--notifier'
+             ,help='command which shows notifications (default: notify-send)'
+             ,action='store'
+             ,dest='notifier'
+             ,default='notify-send')
 opts = op.parse_args()[0]
+if opts.profile or opts.profile_file:
+    stats.enabled = True
+    stats.add_time('import', time.perf_counter() - import_started)
 if opts.about:
     print('Python crawler for http://time.ir website')
     sys.exit(0)
 
-def find_dates(html):
-    container_top = search(html.body, 'div', 'class', 'topWrapper')
-    date = search(container_top, 'div', 'class', ('todayDate',))
-    rows = search(date, 'div', 'class', 'row')
-    solar = find_date(rows, 'shamsi')
-    gregorian = find_date(rows, 'gregorian')
-    return {'solar': solar, 'gregorian': gregorian}
-
-
-def find_date(rows, _type):
-    row = search(rows, 'div', 'class', ('today-' + _type,))
-    date = search(row, 'span', 'class', 'show date').text
-    date_numeral = search(row, 'span', 'class', 'show numeral').text
-    
-    (weekday, (year, month_name, day)) = transform_date(date)
-    (year, season, month, day) = transform_numeral_date(date_numeral)
-    (season_name, season_number) = season
-    return Date(year        = year
-               ,season      = season_number
-               ,season_name = season_name
-               ,month       = month
-               ,month_name  = month_name
-               ,day         = day
-               ,weekday     = weekday)
-
-
-def find_calendar(html):
-    container_top = search(html.body, 'div', 'class', 'topWrapper')
-    calendar_wrapper = search(container_top, 'div', 'class', ('calendarWrapper',))
-    calendar_container = search(calendar_wrapper, 'div', 'id', ('CalendarContainer',))
-    event_calendar = search(calendar_container, 'div', 'class', 'eventCalendar')
-    main_calendar = search(event_calendar, 'div', 'class', 'mainCalendar')
-    day_list = search(main_calendar, 'div', 'class', 'dayList')
-    day_list = [parse_day(day) for day in day_list.getchildren() if day.tag != 'br']
-    return day_list
-
-
-def parse_day(day):
-    if day.tag == 'br':
-        return
-    is_disabled = False
-    is_today = False
-    for attr, value in day.attrib.items():
-        if attr == 'class':
-            if value.find('disabled') != -1:
-                is_disabled = True
-            elif value.find('today') != -1:
-                is_today = True
-    info = day.getchildren()[0]
-    is_holiday = False
-    for attr, value in info.attrib.items():
-        if attr == 'class':
-            if value.find('holiday') != -1:
-                is_holiday = True
-    day_number_jalali = transform_number(search(info, 'div', 'class', ('jalali',)).text)
-    day_number_gregorian = transform_number(search(info, 'div', 'class', ('miladi',)).text)
-    day_number_qamari = transform_number(search(info, 'div', 'class', ('qamari',)).text)
-    return Day(is_disabled
-              ,is_today
-              ,is_holiday
-              ,day_number_jalali
-              ,day_number_gregorian
-              ,day_number_qamari)
-
-
-def find_quote(html):
-    container_top = search(html.body, 'div', 'class', 'topWrapper')
-    random_quote = search(container_top, 'div', 'class', 'randomQuote')
-    author = search(random_quote, 'a', 'class', ('quoteAuthor',)).text
-    quote = search(random_quote, 'span', 'class', ('quoteText',)).text
-    return Quote(author, quote)
-
-# classes for printing transformer's data on screen:
-
-class DrawCalendar:
-
-    def __init__(self, days, theme=None):
-        self.days = days
-        self.theme = theme
-
-
-    def _print(self, text, _type='n'):
-        if self.theme and _type:
-            if _type == 'h':
-                (start, stop) = self.theme.holiday
-            elif _type == 't':
-                (start, stop) = self.theme.today
-            elif _type == 'd':
-                (start, stop) = self.theme.disabled
-            elif _type == 's':
-                (start, stop) = self.theme.solar
-            elif _type == 'o':
-                (start, stop) = self.theme.other_days
-            elif _type == 'q':
-                (start, stop) = self.theme.qamari
-            else: # _type == 'n'
-                (start, stop) = self.theme.normal
-            text = start + text + stop
-        print(text, end='')
-
-
-    def draw(self):
-        self._draw_header()
-        offset = 0
-        week = []
-        count = 35
-        if len(self.days) == 42:
-            count = 42
-        while offset < count:
-            week.append((offset, self.days[offset]))
-            if len(week) == 7:
-                self._draw_week(week)
-                print()
-                week = []
-            offset += 1
-
-
-    def _draw_header(self):
-        self._print(' ________  ________  ________  ________  ________  ________ ', 'n')
-        self._print(' ________\n', 'h')
-        self._print('| Shanbe ||  Yek   ||   Do   ||   Se   || Chahar ||  Panj  |', 'n')
-        self._print('| Jom\'eh |\n', 'h')
-
-
-    def _draw_week(self, week):
-        self._draw_week_top(week)
-        print()
-        self._draw_week_empty(week)
-        print()
-        self._draw_week_day_number(week)
-        print()
-        self._draw_week_day_numbers(week)
-        print()
-        self._draw_week_buttom(week)
-
-
-    def _draw_week_top(self, week):
-        for offset, day in week:
-            if day.is_today:
-                _type = 't'
-            elif day.is_disabled:
-                _type = 'd'
-            elif day.is_holiday:
-                _type = 'h'
-            else:
-                _type = 'n'
-            self._print(' ' + ('_' * 8) + ' ', _type)
-
-
-    def _draw_week_empty(self, week):
-        for offset, day in week:
-            if day.is_today:
-                _type = 't'
-            elif day.is_disabled:
-                _type = 'd'
-            elif day.is_holiday:
-                _type = 'h'
-            else:
-                _type = 'n'
-            self._print('|' + (' ' * 8) + '|', _type)
-
-
-    def _draw_week_day_number(self, week):
-        for offset, day in week:
-            if day.is_today and day.is_holiday:
-                (type1, type2) = ('t', 'h')
-            elif day.is_today:
-                (type1, type2) = ('t', 's')
-            elif day.is_disabled and day.is_holiday:
-                (type1, type2) = ('d', 'h')
-            elif day.is_disabled:
-                (type1, type2) = ('d', 'd')
-            elif day.is_holiday:
-                (type1, type2) = ('h', 'h')
-            else:
-                (type1, type2) = ('n', 'n')
-            self._print('|   ', type1)
-            self._print(day.solar, type2)
-            self._print('   |', type1)
-
-
-    def _draw_week_day_numbers(self, week):
-        for offset, day in week:
-            if day.is_today and day.is_holiday:
-                (type1, type2) = ('o', 't')
-            elif day.is_today:
-                (type1, type2) = ('o', 't')
-            elif day.is_disabled:
-                (type1, type2) = ('d', 'd')
-            elif day.is_holiday:
-                (type1, type2) = ('o', 'h')
-            else:
-                (type1, type2) = ('o', 'n')
-            self._print('| ', type2)
-            self._print(day.qamari, type1)
-            self._print('  ')
-            self._print(day.gregorian, type1)
-            self._print(' |', type2)
-
-
-    def _draw_week_buttom(self, week):
-        for offset, day in week:
-            if day.is_today:
-                _type = 't'
-            elif day.is_disabled:
-                _type = 'd'
-            elif day.is_holiday:
-                _type = 'h'
-            else:
-                _type = 'n'
-            self._print('|' + ('_' * 8) + '|', _type)
-
-
-class PrintTime:
-
-    def __init__(self, time, theme=None):
-        self.time = time
-        self.theme = theme
-
-
-    def _print(self, unit, _type=None):
-        if self.theme and _type:
-            if _type == 'h':
-                (start, stop) = self.theme.hour
-            elif _type == 'm':
-                (start, stop) = self.theme.minute
-            else: # _type == 's'
-                (start, stop) = self.theme.second
-            unit = start + unit + stop
-        print(unit, end='')
-
-
-    def print(self):
-        self._print(self.time.hour, 'h')
-        print(':', end='')
-        self._print(self.time.minute, 'm')
-        if self.time.second:
-            print(':', end='')
-            self._print(self.time.second, 's')
-
-
-class PrintDate:
-
-    def __init__(self, date, theme=None):
-        self.date = date
-        self.theme = theme
-
-    def _print(self, item, _type=None):
-        if self.theme and _type:
-            if _type == 'y':
-                (start, stop) = self.theme.year
-            elif _type == 'm':
-                (start, stop) = self.theme.month
-            elif _type == 'd':
-                (start, stop) = self.theme.day
-            elif _type == 'w':
-                (start, stop) = self.theme.weekday
-            elif type(_type) == int: # season number
-                (start, stop) = self.theme.seasons[_type-1]
-            else: # _type == 'M':
-                (start, stop) = self.theme.month_name
-            item = start + item + stop
-        print(item, end='')
-
-
-    def print(self):
-        self._print('{:^10}'.format(self.date.weekday), 'w')
-        self._print(' ')
-        self._print(self.date.day, 'd')
-        self._print('{:^13}'.format(self.date.month_name), 'M')
-        self._print('(')
-        self._print(self.date.month, 'm')
-        self._print(') ')
-        self._print(self.date.year, 'y')
-        self._print(' ')
-        self._print('{:^10}'.format(self.date.season_name), int(self.date.season))
-
-
 class Notify:
 
-    def __init__(self, command='notify-send', arguments=[]):
-        self.command = command
-        self.arguments = arguments
+    def __init__(self, title='time.ir', text=None, time=5000):
+        self.title = title
+        self.text = text
+        self.time = time
 
 
     def _detect_time(self, text):
@@ -395,28 +245,48 @@ class Notify:
             time += 50
         return time
 
-    
-    def notify(self):
-        for argument in self.arguments:
-            if argument == None:
-                return
-        subprocess.call([self.command] + self.arguments)
+
+    def is_empty(self):
+        return self.text == None
+
+
+    def key(self):
+        # same notification has same key, see Notifications
+        import hashlib
+        return hashlib.sha1((self.title + '\0' + self.text).encode('utf-8')).hexdigest()
+
+
+    def arguments(self):
+        return ['-t', str(self.time), self.title, self.text]
+
+
+    def summary(self):
+        # text of notification when it's sent with others under a common title
+        return self.text
 
 
 class NotifyQuote(Notify):
 
     def __init__(self, quote):
-        Notify.__init__(self)
-        time = self._detect_time(quote.text)
-        self.arguments = ['-t'
-                         ,str(time)
-                         ,'time.ir - {}'.format(quote.author)
-                         ,quote.text]
+        self.author = quote.author
+        Notify.__init__(self
+                       ,'time.ir - {}'.format(quote.author)
+                       ,quote.text
+                       ,self._detect_time(quote.text))
+
+
+    def summary(self):
+        return '{}\n- {}'.format(self.text, self.author)
 
 
 class NotifyHolidays(Notify):
 
-    def __init__(self, days):
+    def __init__(self, days, next_days=None):
+        if next_days:
+            # days after this month are read from calendar of next month
+            #  instead of disabled days of this one
+            days = [day for day in days if not day.is_disabled] + \
+                   [day for day in next_days if not day.is_disabled]
         (day1, day2) = self._find_two_next_days(days)
         
         if day1 and day1.is_holiday and day2 and day2.is_holiday:
@@ -428,11 +298,7 @@ class NotifyHolidays(Notify):
         else:
             text = None
 
-        Notify.__init__(self)
-        self.arguments = ['-t'
-                         ,'5000'
-                         ,'time.ir'
-                         ,text]
+        Notify.__init__(self, 'time.ir', text, 5000)
 
     def _find_two_next_days(self, days):
         day1 = None
@@ -449,149 +315,354 @@ class NotifyHolidays(Notify):
                 day1 = day
         return (day1, day2)
 
+# Sends notifications of a run as one notification, without waiting for the
+#  notifier command. Notifications of different kinds are sent under title of
+#  Notify (e.g. quote and holidays), and each one's title is kept in its text. Notifications which were sent today (e.g. by tir in
+#  another shell) are not sent again; their keys are kept in file_path after
+#  date of today. File is checked and updated under a lock, so tir commands
+#  which run at the same time send each notification once.
+# Any command which accepts notify-send's arguments (-t MILLISECONDS TITLE
+#  TEXT) can be used as notifier, e.g. a script which logs its arguments.
+
+class Notifications:
+
+    def __init__(self, command='notify-send', file_path=None):
+        self.command = command
+        self.file_path = file_path
+        self.notifiers = []
+
+
+    def add(self, notifier):
+        if not notifier.is_empty():
+            self.notifiers.append(notifier)
+
+
+    def sent(self):
+        # keys of notifications which were sent today
+        today = str(datetime.date.today())
+        if not self.file_path or not os.path.exists(self.file_path):
+            return set()
+        with open(self.file_path, encoding='utf-8') as sent_file:
+            lines = sent_file.read().split('\n')
+        if lines[0] != today:
+            return set()
+        return set(lines[1:])
+
+
+    def save(self, keys):
+        if not self.file_path:
+            return
+        write_atomic(self.file_path, '\n'.join([str(datetime.date.today())] + sorted(keys)))
+
+
+    def coalesce(self, notifiers):
+        if len(notifiers) == 1:
+            return notifiers[0]
+        return Notify(text = '\n\n'.join([notifier.summary() for notifier in notifiers])
+                     ,time = sum([notifier.time for notifier in notifiers]))
+
+
+    def send(self):
+        # returns count of notifiers which were sent
+        if not self.command or not self.notifiers:
+            return 0
+        if not self.file_path:
+            return self._send(set())
+        with FileLock(self.file_path + '.lock'):
+            return self._send(self.sent())
+
+
+    def _send(self, sent):
+        notifiers = [notifier for notifier in self.notifiers if notifier.key() not in sent]
+        if not notifiers:
+            return 0
+        import subprocess
+        stats.count('notifications')
+        subprocess.Popen([self.command] + self.coalesce(notifiers).arguments()
+                        ,stdin=subprocess.DEVNULL
+                        ,stdout=subprocess.DEVNULL
+                        ,stderr=subprocess.DEVNULL
+                        ,start_new_session=True)
+        self.save(sent | set([notifier.key() for notifier in notifiers]))
+        return len(notifiers)
+
 # class for check&save request body in local cache, once saved it's not send
 # another request in the day, instead get data from local cache
 # it will improve the performance and save time
+# Cache file contains date and a line of transformers' data, validators and
+#  hashes of parts of page which they used (see tir.cache). If data is dumped
+#  by another version of tir, page is fetched again (or parsed again if an
+#  older version of tir has kept page after data). If only date is changed,
+#  it's replaced in place.
+# Cache file is replaced atomically, and a process which refreshes it holds
+#  lock() so other tir processes wait for its result instead of fetching
+#  time.ir too (see load()).
     
 class Caching:
     file_path = ""
+    content = "" # of cache file when it's read or written
 
     def check_cache(self):
+        with stats.timer('cache.read'):
+            return self._check_cache()
+
+    def _check_cache(self):
         self.file_path = self.cache_folder() + '/.tir_cache'
         cache_file_content = self.get_read_file()
         if not cache_file_content:
             return ""
         finally_cache = {
             'date' : cache_file_content[:10],
-            'body' : cache_file_content[11:],
+            'data' : None,
+            'validators' : {},
+            'hashes' : {},
+            'body' : cache_file_content[10:],
         }
+        if cache_file_content[10:11] == '\n':
+            (line, _, body) = cache_file_content[11:].partition('\n')
+            (finally_cache['data'], finally_cache['validators'], finally_cache['hashes']) = load_transformed(line)
+            finally_cache['body'] = body
+            if finally_cache['data'] == None and not body:
+                return ""
         return finally_cache
 
     def cache_folder(self):
-        cache_folder = Path(str(Path.home()) + '/.cache/')
-        if not cache_folder.is_dir():
-            os.mkdir(check_cache)
-        return str(cache_folder)
+        cache_folder = os.path.join(os.path.expanduser('~'), '.cache')
+        if not os.path.isdir(cache_folder):
+            os.makedirs(cache_folder, exist_ok=True)
+        return cache_folder
 
     def get_read_file(self):
-        self.check_file_exist(self.file_path)
-        with open(self.file_path) as cache_file:
-            return cache_file.read()
-
-    def check_file_exist(self, file_path):
-        if not os.path.exists(self.file_path):
-            with open(self.file_path, 'w'): pass
-
-    def write_response(self, body):
-        body = str(datetime.date.today()) + body
-        with open(self.file_path, 'w', encoding= "utf-8") as cache_file:
-            cache_file.write(body)
+        try:
+            with open(self.file_path, encoding='utf-8') as cache_file:
+                self.content = cache_file.read()
+        except FileNotFoundError:
+            self.content = ""
+        return self.content
+
+    def lock(self):
+        return FileLock(self.file_path + '.lock')
+
+    def write_response(self, transformed, validators=None, hashes=None):
+        with stats.timer('cache.write'):
+            date = str(datetime.date.today())
+            content = '\n' + dump_transformed(transformed, validators, hashes) + '\n'
+            if self.content[10:] != content:
+                write_atomic(self.file_path, date + content)
+            elif self.content[:10] != date:
+                descriptor = os.open(self.file_path, os.O_WRONLY)
+                try:
+                    os.pwrite(descriptor, date.encode('utf-8'), 0)
+                finally:
+                    os.close(descriptor)
+            self.content = date + content
 
     def is_today(self, cache_date):
         return str(datetime.date.today()) == cache_date
     
     def delete(self):
-        with open(self.file_path, 'w', encoding= "utf-8") as cache_file:
-            cache_file.write("")
+        try:
+            os.remove(self.file_path)
+        except FileNotFoundError:
+            pass
 
 
-def warn_notifier_error(command, exception):
+def warn_notifier_error(opts, command, exception):
     text = 'Notifier ERROR: could not work with command {!r} on this system'.format(command)
     if opts.color:
             text = '\033[1;30m' + text + '\033[0m' # gray (dark)
     print(text)
 
-def main(data):
-    transformers = {1: find_dates
-                   ,2: find_calendar
-                   ,3: find_quote}
-    transformed = HTMLParser(data, transformers).parse()
-    now = datetime.datetime.now()
-    transformed[4] = Time(hour   = transform_number(str(now.hour))
-                         ,minute = transform_number(str(now.minute))
-                         ,second = transform_number(str(now.second)))
-
-    dates = transformed[1]
-
-    if opts.solar:
-        solar_date = dates['solar']
-        print('Emruz: ', end='')
-        date_theme = None
-        if opts.color:
-            date_theme = DateTheme(year      = ('\033[0;36m', '\033[0m')
-                                  ,seasons   = (('\033[1;31m', '\033[0m')  # green for Spring
-                                               ,('\033[1;31m', '\033[0m')  # red for Summer
-                                               ,('\033[1;33m', '\033[0m')  # yellow for Autumn
-                                               ,('\033[1;36m', '\033[0m')) # blue for Winter
-                                  ,month     = ('\033[1;33m', '\033[0m')
-                                  ,month_name= ('\033[1;35m', '\033[0m')
-                                  ,weekday   = ('\033[1;34m', '\033[0m')
-                                  ,day       = ('\033[1;36m', '\033[0m'))
-        PrintDate(solar_date, date_theme).print()
-        print()        
+transformers = {'dates':    find_dates
+               ,'calendar': find_calendar
+               ,'quote':    find_quote}
+
+def fetch(opts, validators, previous=None):
+    # main page and '/fa/main' are fetched at the same time and the first one
+    #  which transformers find their data in is used (see
+    #  AsyncRequest.get_page()). Parser stops once transformers have their
+    #  data, and transformers which their part of page is same as previous
+    #  (see StreamingHTMLParser) are not run again.
+    import asyncio
+
+    def parse(body):
+        chunks = [body[offset:offset + 8192] for offset in range(0, len(body), 8192)]
+        parser = StreamingHTMLParser(chunks, transformers, SUBTREES, previous=previous)
+        return (parser.parse(), parser.hashes)
+
+    request = AsyncRequest(concurrency=2
+                          ,connect_timeout=opts.connect_timeout
+                          ,read_timeout=opts.read_timeout
+                          ,validators=validators)
+    loop = asyncio.new_event_loop()
+    try:
+        (transformed, hashes) = loop.run_until_complete(request.get_page(parse))
+    finally:
+        loop.close()
+        request.close()
+    return (transformed, request.request.validators, hashes)
+
+def calendar_theme(opts):
+    if not opts.color:
+        return None
+    return CalendarTheme(disabled   = ('\033[1;30m', '\033[0m')  # gray (dark)
+                        ,holiday    = ('\033[1;31m', '\033[0m')  # red
+                        ,today      = ('\033[1;32m', '\033[0m')  # green (bold)
+                        ,normal     = ('\033[1;37m', '\033[0m')  # white
+                        ,solar      = ('\033[1;32m', '\033[0m')  # green
+                        ,other_days = ('\033[0;37m', '\033[0m')) # gray (light)
+
+def draw_stored_month(opts, store, year_month):
+    if year_month.isdigit(): # a year, months which are not fetched are computed
+        months = [(int(year_month), month) for month in range(1, 13)]
+        try:
+            if opts.format != 'text':
+                write_calendars(opts, month_calendars(months, store))
+                return 0
+            for text in render_months(months, calendar_theme(opts), store):
+                sys.stdout.write(text + '\n')
+        except ValueError as exception: # out of range of calendars
+            logger.error(str(exception))
+            return 1
+        return 0
+    try:
+        (year, month) = [int(item) for item in year_month.split('/')]
+    except ValueError:
+        logger.error('month should be in YEAR/MONTH or YEAR format, e.g. 1397/08')
+        return 1
+    days = store.month(year, month)
+    if days == None:
+        logger.error('calendar of {}/{:02d} is not fetched yet'.format(year, month))
+        return 1
+    if opts.format != 'text':
+        write_calendars(opts, [(year, month, days)])
+        return 0
+    sys.stdout.write(render_calendar(days, calendar_theme(opts)))
+    return 0
+
+def write_calendars(opts, calendars):
+    # days of calendars in --format, line by line
+    if opts.format == 'json':
+        sys.stdout.write(to_json([{'year': str(year), 'month': '{:02d}'.format(month), 'days': days}
+                                  for (year, month, days) in calendars]) + '\n')
+        return
+    write_records(opts, {'calendar': calendars})
+
+def write_records(opts, data):
+    # records of data in ndjson or csv --format, line by line
+    lines = to_ndjson(data) if opts.format == 'ndjson' else to_csv(data)
+    for line in lines:
+        sys.stdout.write(line)
+
+def crawl(opts, store, months_range):
+    try:
+        (start, stop) = months_range.split('-')
+        if start.isdigit() and stop.isdigit(): # years
+            (start, stop) = ((int(start), 1), (int(stop), 12))
+        else:
+            (start, stop) = [tuple([int(item) for item in year_month.split('/')])
+                             for year_month in (start, stop)]
+            if len(start) != 2 or len(stop) != 2:
+                raise ValueError(months_range)
+    except ValueError:
+        logger.error('months should be in FROM-TO format, e.g. 1390/01-1397/12 or 1390-1397')
+        return 1
+    months = []
+    while start <= stop:
+        months.append(start)
+        start = (start[0] + start[1] // 12, start[1] % 12 + 1)
+    try:
+        for ((year, month), _) in crawl_months(months
+                                              ,{'calendar': find_calendar}
+                                              ,store=store
+                                              ,connect_timeout=opts.connect_timeout
+                                              ,read_timeout=opts.read_timeout):
+            print('{}/{:02d}'.format(year, month))
+    except Exception as exception:
+        logger.error('could not crawl calendars: {}'.format(exception))
+        return 1
+    return 0
+
+def offline(opts, store):
+    # today's data without time.ir, if calendar of this month is fetched
+    #  before (other holidays than Fridays are only known from time.ir) and
+    #  quote is not needed or there are quotes in corpus of fetched quotes
+    quote = None
+    if opts.quote:
+        quote = quotes.of_day(datetime.date.today())
+        if quote == None:
+            return None
+    dates = solar_dates()
+    solar_date = dates['solar']
+    days = store.month(solar_date.year, solar_date.month, today=solar_date.day)
+    if days == None:
+        if opts.calendar or opts.holidays:
+            return None
+        days = solar_calendar(solar_date.year, solar_date.month, today=solar_date.day)
+    return {'dates': dates, 'calendar': days, 'quote': quote}
 
-    if opts.gregorian:
-        gregorian_date = dates['gregorian']
-        print('Today: ', end='')
-        date_theme = None
-        if opts.color:
-            date_theme = DateTheme(year      = ('\033[0;36m', '\033[0m')
-                                  ,seasons   = (('\033[1;31m', '\033[0m')
-                                               ,('\033[1;31m', '\033[0m')
-                                               ,('\033[1;33m', '\033[0m')
-                                               ,('\033[1;36m', '\033[0m'))
-                                  ,month     = ('\033[1;33m', '\033[0m')
-                                  ,month_name= ('\033[1;35m', '\033[0m')
-                                  ,weekday   = ('\033[1;34m', '\033[0m')
-                                  ,day       = ('\033[1;36m', '\033[0m'))
-        PrintDate(gregorian_date, date_theme).print()
-        print()
+def print_dates(opts, dates):
+    text = ''
+    date_theme = None
+    if opts.color:
+        date_theme = DateTheme(year      = ('\033[0;36m', '\033[0m')
+                              ,seasons   = (('\033[1;31m', '\033[0m')  # green for Spring
+                                           ,('\033[1;31m', '\033[0m')  # red for Summer
+                                           ,('\033[1;33m', '\033[0m')  # yellow for Autumn
+                                           ,('\033[1;36m', '\033[0m')) # blue for Winter
+                              ,month     = ('\033[1;33m', '\033[0m')
+                              ,month_name= ('\033[1;35m', '\033[0m')
+                              ,weekday   = ('\033[1;34m', '\033[0m')
+                              ,day       = ('\033[1;36m', '\033[0m'))
+    with stats.timer('render.dates'):
+        if opts.solar:
+            text += 'Emruz: ' + render_date(dates['solar'], date_theme) + '\n'
+        if opts.gregorian:
+            text += 'Today: ' + render_date(dates['gregorian'], date_theme) + '\n'
+        sys.stdout.write(text)
+
+def system_time():
+    now = datetime.datetime.now()
+    return Time(hour   = transform_number(str(now.hour))
+               ,minute = transform_number(str(now.minute))
+               ,second = transform_number(str(now.second)))
 
+def print_time(opts):
     if opts.time:
-        time = transformed[4]
+        time = system_time()
         time_theme = None
         if opts.color:
             time_theme = TimeTheme(hour   = ('\033[1;31m', '\033[0m') # red
                                   ,minute = ('\033[1;31m', '\033[0m')
                                   ,second = ('\033[1;31m', '\033[0m'))
-        print('System time: ', end='')
-        PrintTime(time, time_theme).print()
-        print()
+        with stats.timer('render.time'):
+            sys.stdout.write('System time: ' + render_time(time, time_theme) + '\n')
 
+def print_calendar(opts, calendar_days):
     if opts.calendar:
-        calendar_days = transformed[2]
-        calendar_theme = None
-        if opts.color:
-            calendar_theme = CalendarTheme(disabled   = ('\033[1;30m', '\033[0m')  # gray (dark)
-                                          ,holiday    = ('\033[1;31m', '\033[0m')  # red
-                                          ,today      = ('\033[1;32m', '\033[0m')  # green (bold)
-                                          ,normal     = ('\033[1;37m', '\033[0m')  # white
-                                          ,solar      = ('\033[1;32m', '\033[0m')  # green
-                                          ,other_days = ('\033[0;37m', '\033[0m')) # gray (light)
-        DrawCalendar(calendar_days, calendar_theme).draw()
+        with stats.timer('render.calendar'):
+            text = render_calendar(calendar_days, calendar_theme(opts))
         if not opts.color: # user did not see colored calendar so he/she does not know about holidays
             for day in calendar_days:
                 if day.is_today:
                     if day.is_holiday:
-                        print('*.' * 13 + ' Today is Holiday ' + '.*' * 13)
+                        text += '*.' * 13 + ' Today is Holiday ' + '.*' * 13 + '\n'
                     break
+        sys.stdout.write(text)
 
+def notify(opts, transformed):
+    notifications = Notifications(opts.notifier, cache.cache_folder() + '/.tir_notified')
     if opts.quote:
-        quote = transformed[3]
-        notifier = NotifyQuote(quote)
-        try:
-            notifier.notify()
-        except Exception as exception:
-            warn_notifier_error(notifier.command, exception)
-
+        notifications.add(NotifyQuote(transformed['quote']))
     if opts.holidays:
-        days = transformed[2]
-        notifier = NotifyHolidays(days)
-        try:
-            notifier.notify()
-        except Exception as exception:
-            warn_notifier_error(notifier.command, exception)
-    
+        notifications.add(NotifyHolidays(transformed['calendar'], next_calendar(transformed)))
+    try:
+        with stats.timer('notify'):
+            notifications.send()
+    except Exception as exception:
+        warn_notifier_error(opts, notifications.command, exception)
+
+def print_footer(opts):
     if opts.solar or opts.gregorian or opts.calendar or opts.time or opts.quote or opts.calendar:
         print()
         text = '{}Powered by {}{}http://time.ir{}'
@@ -601,27 +672,395 @@ def main(data):
             text = text.format('', '', '', '')
         print(text)
 
-status_code = 0
-cache        = Caching()
-read_cache   = False
-update_cache = False
-data         = ""
-try:
+def print_data(opts, transformed):
+    # data which is not hidden by options in --format, instead of rendering
+    #  it. Data is written as it's in transformers' named tuples, quote is
+    #  None if it's not known.
+    data = {}
+    if opts.solar:
+        data['solar'] = transformed['dates']['solar']
+    if opts.gregorian:
+        data['gregorian'] = transformed['dates']['gregorian']
+    if opts.time:
+        data['time'] = system_time()
+    if opts.calendar:
+        data['calendar'] = transformed['calendar']
+    if opts.quote:
+        data['quote'] = transformed['quote']
+    if opts.format != 'json':
+        if opts.calendar:
+            solar_date = transformed['dates']['solar']
+            data['calendar'] = [(solar_date.year, solar_date.month, transformed['calendar'])]
+        with stats.timer('render.' + opts.format):
+            write_records(opts, data)
+        return
+    with stats.timer('render.json'):
+        sys.stdout.write(to_json(data) + '\n')
+
+def main(opts, transformed):
+    if opts.format != 'text':
+        return print_data(opts, transformed)
+    print_dates(opts, transformed['dates'])
+    print_time(opts)
+    print_calendar(opts, transformed['calendar'])
+    notify(opts, transformed)
+    print_footer(opts)
+
+
+def is_fresh(cache_content):
+    return bool(cache_content) and \
+           cache.is_today(cache_content['date']) and \
+           cache_content['data'] != None
+
+class CacheBusy(Exception):
+    # another process is refreshing cache for longer than a fetch may take
+    pass
+
+def load(opts, update):
+    # returns (today's transformers' data, was it read from cache?)
     cache_content = cache.check_cache()
-    if opts.update_cache or \
+    if not update and is_fresh(cache_content):
+        return (cache_content['data'], True)
+    if not update and opts.max_stale > 0:
+        # shown at once while cache is refreshed in background
+        transformed = stale(opts, cache_content)
+        if transformed != None:
+            stats.count('cache.stale')
+            refresh_in_background(opts, cache_content)
+            return (transformed, True)
+        if not cache_content or not cache.is_today(cache_content['date']):
+            transformed = offline(opts, store)
+            if transformed != None:
+                stats.count('cache.offline')
+                refresh_in_background(opts, cache_content)
+                return (transformed, False)
+    # Only one process refreshes cache. Others wait for it as long as a fetch
+    #  may take and use its result, or use stale data of cache if it takes
+    #  longer. Old data is not shown when it's asked to be updated.
+    lock = cache.lock()
+    if not lock.acquire(timeout=0):
+        timeout = opts.connect_timeout + opts.read_timeout
+        with stats.timer('cache.lock'):
+            locked = lock.acquire(timeout=timeout)
+        if not locked and update:
+            raise CacheBusy('another tir process is updating cache for more than {:g} seconds, '
+                            'try again later'.format(timeout))
+        if not locked and cache_content and cache_content['data'] != None:
+            return (cache_content['data'], True)
+        refreshed = cache.check_cache()
+        if is_fresh(refreshed) and (not update or refreshed != cache_content):
+            lock.release()
+            return (refreshed['data'], True)
+        cache_content = refreshed
+    try:
+        return refresh(opts, update, cache_content)
+    finally:
+        lock.release()
+
+def stale(opts, cache_content):
+    # today's data from cache of an earlier day which is not older than
+    #  --max-stale days: dates are computed, calendar is read from store if
+    #  this month is fetched before and quote is the cached one
+    if not cache_content or cache_content['data'] == None:
+        return None
+    try:
+        cache_date = datetime.date(*[int(part) for part in cache_content['date'].split('-')])
+    except (TypeError, ValueError):
+        return None
+    if not 0 < (datetime.date.today() - cache_date).days <= opts.max_stale:
+        return None
+    dates = solar_dates()
+    solar_date = dates['solar']
+    days = store.month(solar_date.year, solar_date.month, today=solar_date.day)
+    if days == None:
+        return None
+    return {'dates': dates, 'calendar': days, 'quote': cache_content['data']['quote']}
+
+def refresh_in_background(opts, cache_content):
+    # refreshes cache in background, unless another process is refreshing it
+    in_background(cache.lock(), refresh, opts, True, cache_content)
+
+def in_background(lock, function, *arguments):
+    # runs function in a detached process if lock is free. The process
+    #  inherits the lock, so processes which start after this one see that
+    #  function is running.
+    if not hasattr(os, 'fork'):
+        return
+    if not lock.acquire(timeout=0):
+        return
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid:
+        lock.release() # its file is still open in child
+        os.waitpid(pid, 0)
+        return
+    status_code = 0
+    try:
+        # child of a new session which is not waited by anyone, exits:
+        os.setsid()
+        if os.fork():
+            os._exit(0)
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for descriptor in (0, 1, 2):
+            os.dup2(devnull, descriptor)
+        function(*arguments)
+    except BaseException:
+        status_code = 1
+    finally:
+        os._exit(status_code)
+
+def refresh(opts, update, cache_content):
+    validators   = {}
+    hashes       = {}
+    update_cache = False
+    if update or \
        not cache_content or \
        not cache.is_today(cache_content['date']):
-        data = Request().get()
+        previous = {}
+        if cache_content and cache_content['data'] != None:
+            validators = cache_content['validators']
+            hashes = cache_content['hashes']
+            previous = {name: (digest, cache_content['data'][name])
+                        for (name, digest) in hashes.items()
+                        if name in cache_content['data']}
+        try:
+            (transformed, validators, hashes) = fetch(opts, validators, previous)
+        except NotModified: # page is same as cached one
+            transformed = cache_content['data']
         update_cache = True
     else:
-        data = cache_content['body']
-        read_cache = True
-    main(data)
-    # Everything is ok to keep new data in cache:
+        transformed = cache_content['data']
+        if transformed == None:
+            try:
+                transformed = HTMLParser(cache_content['body'], transformers).parse()
+            except Exception:
+                # We have red cache and something went wrong, So it's better to delete it:
+                cache.delete()
+                raise
+            update_cache = True
+        else:
+            return (transformed, True)
     if update_cache:
-        cache.write_response(data)
+        cache.write_response(transformed, validators, hashes)
+        solar_date = transformed['dates']['solar']
+        with stats.timer('store.write'):
+            store.put(solar_date.year, solar_date.month, transformed['calendar'])
+        with stats.timer('quotes.write'):
+            quotes.add(transformed['quote'])
+    return (transformed, False)
+
+# In last PREFETCH_DAYS days of a solar month, calendar of next month is
+#  fetched in background and kept in store, for holidays of next days and for
+#  showing first days of next month without waiting for time.ir (see stale()).
+# If it fails (e.g. time.ir is not reachable), time of failure is kept by
+#  modification time of a file next to store and it's not tried again for
+#  PREFETCH_RETRY seconds.
+
+PREFETCH_DAYS = 3
+PREFETCH_RETRY = 3600
+
+def is_end_of_month(solar_date):
+    (year, month, day) = (int(solar_date.year), int(solar_date.month), int(solar_date.day))
+    return jalali_month_length(year, month) - day < PREFETCH_DAYS
+
+def next_month(solar_date):
+    (year, month) = (int(solar_date.year), int(solar_date.month))
+    return (year + month // 12, month % 12 + 1)
+
+def next_calendar(transformed):
+    # calendar of next month if it's prefetched
+    solar_date = transformed['dates']['solar']
+    if not is_end_of_month(solar_date):
+        return None
+    store.refresh()
+    return store.month(*next_month(solar_date))
+
+def prefetch(opts, transformed):
+    solar_date = transformed['dates']['solar']
+    if not is_end_of_month(solar_date):
+        return
+    if next_month(solar_date) in store:
+        return
+    try:
+        if time.time() - os.stat(store.file_path + '.prefetch.failed').st_mtime < PREFETCH_RETRY:
+            return
+    except FileNotFoundError:
+        pass
+    in_background(FileLock(store.file_path + '.prefetch.lock'), prefetch_month, opts, *next_month(solar_date))
+
+def prefetch_month(opts, year, month):
+    failed_path = store.file_path + '.prefetch.failed'
+    try:
+        days = fetch_month(year
+                          ,month
+                          ,connect_timeout=opts.connect_timeout
+                          ,read_timeout=opts.read_timeout)
+    except Exception:
+        write_atomic(failed_path, '{}/{:02d}'.format(year, month))
+        raise
+    store.put(year, month, days)
+    try:
+        os.remove(failed_path)
+    except FileNotFoundError:
+        pass
+
+def seconds_to_midnight():
+    # of Tehran, when time.ir shows next day
+    try:
+        from zoneinfo import ZoneInfo
+        zone = ZoneInfo('Asia/Tehran')
+    except Exception:
+        zone = datetime.timezone(datetime.timedelta(hours=3, minutes=30))
+    now = datetime.datetime.now(zone)
+    midnight = (now + datetime.timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (midnight - now).total_seconds()
+
+# A daemon which keeps today's data in memory and answers ask_daemon() of
+#  other tir commands. For each set of arguments, it keeps rendered output
+#  before and after system time, so answering a command is joining them with
+#  current time. Data is refreshed at midnight and when a command has
+#  --update-cache option, and notifications are sent after answering.
+
+class Daemon:
+
+    def __init__(self, opts):
+        self.opts = opts
+        self.socket_path = opts.socket
+        self.transformed = None
+        self.rendered = {} # arguments -> (output before time, output after time)
+        self.refresh_at = 0
+
+
+    def refresh(self, update=False):
+        import copy
+        import traceback
+        # data which is needed for all options:
+        opts = copy.copy(self.opts)
+        (opts.quote, opts.calendar, opts.holidays) = (True, True, True)
+        opts.max_stale = 0 # data is kept until midnight, it should be today's
+        try:
+            (self.transformed, _) = load(opts, update)
+            prefetch(opts, self.transformed)
+            self.rendered = {}
+            self.refresh_at = datetime.datetime.now().timestamp() + seconds_to_midnight()
+        except Exception:
+            logger.error('could not refresh data, trying again in a minute')
+            traceback.print_exc()
+            self.refresh_at = datetime.datetime.now().timestamp() + 60
+
+
+    def serve(self):
+        import socket
+        import traceback
+        if os.path.exists(self.socket_path):
+            client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                client.connect(self.socket_path)
+                logger.error('another daemon is running on {!r}'.format(self.socket_path))
+                return 1
+            except OSError: # it's left from a stopped daemon
+                os.remove(self.socket_path)
+            finally:
+                client.close()
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        server.listen(16)
+        self.refresh()
+        try:
+            while True:
+                timeout = self.refresh_at - datetime.datetime.now().timestamp()
+                if timeout <= 0:
+                    self.refresh(update=True)
+                    continue
+                server.settimeout(timeout)
+                try:
+                    (connection, _) = server.accept()
+                except socket.timeout:
+                    continue
+                try:
+                    self.handle(connection)
+                except OSError: # client has gone
+                    pass
+                except Exception:
+                    traceback.print_exc()
+        finally:
+            server.close()
+            os.remove(self.socket_path)
+
+
+    def handle(self, connection):
+        import io
+        import contextlib
+        connection.settimeout(2)
+        with connection:
+            request = b''.join(iter(lambda: connection.recv(65536), b''))
+            arguments = []
+            if request:
+                arguments = request.decode('utf-8').split('\0')
+            try:
+                # help or errors of options are written by client
+                with contextlib.redirect_stdout(io.StringIO()), \
+                     contextlib.redirect_stderr(io.StringIO()):
+                    client_opts = op.parse_args(arguments)[0]
+            except SystemExit: # wrong arguments or help, client shows them
+                connection.sendall(b'-')
+                return
+            if client_opts.about or client_opts.month or client_opts.crawl or client_opts.format != 'text':
+                connection.sendall(b'-')
+                return
+            if client_opts.update_cache:
+                self.refresh(update=True)
+            if self.transformed == None:
+                connection.sendall(b'-')
+                return
+            key = tuple(sorted(arguments))
+            if key not in self.rendered:
+                self.rendered[key] = (self.render(print_dates, client_opts, self.transformed['dates'])
+                                     ,self.render(print_calendar, client_opts, self.transformed['calendar']) +
+                                      self.render(print_footer, client_opts))
+            (before_time, after_time) = self.rendered[key]
+            output = before_time + self.render(print_time, client_opts) + after_time
+            connection.sendall(b'0' + output.encode('utf-8'))
+        # client does not wait for notifications:
+        self.render(notify, client_opts, self.transformed)
+
+
+    def render(self, function, *arguments):
+        import io
+        import contextlib
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            function(*arguments)
+        return output.getvalue()
+
+
+cache = Caching()
+store = CalendarStore(cache.cache_folder() + '/.tir_calendar')
+quotes = QuoteCorpus(cache.cache_folder() + '/.tir_quotes')
+if opts.month:
+    sys.exit(draw_stored_month(opts, store, opts.month))
+if opts.crawl:
+    sys.exit(crawl(opts, store, opts.crawl))
+if opts.daemon:
+    try:
+        sys.exit(Daemon(opts).serve())
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+status_code = 0
+read_cache  = False
+try:
+    with stats.timer('run'):
+        (transformed, read_cache) = load(opts, opts.update_cache)
+        main(opts, transformed)
+        prefetch(opts, transformed)
 except KeyboardInterrupt:
     print()
+except CacheBusy as exception:
+    logger.error(str(exception))
+    status_code = 1
 except Exception as exception:
     # We have red cache and something went wrong, So it's better to delete it:
     if read_cache:
@@ -632,7 +1071,12 @@ except Exception as exception:
                  'Pleas open an issue in:\n'                                  \
                  '\thttps://github.com/Pouriya-Jahanbakhsh/tir/issues/new\n'  \
                  'with below details:')
+    import traceback
     traceback.print_exc()
     print()
     status_code = 1
+if opts.profile:
+    sys.stderr.write('\n' + stats.report())
+if opts.profile_file:
+    stats.write_record(opts.profile_file)
 sys.exit(status_code)
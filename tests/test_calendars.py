@@ -0,0 +1,87 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tir.calendars import *
+
+
+# Day of March of 1 Farvardin (Nowruz) of jalali years 1354 to 1410, from
+#  published Iranian calendars (gregorian year is jalali year + 621):
+NOWRUZ = dict(zip(range(1354, 1411)
+                 ,[21, 21, 21, 21, 21, 21, 21, 21, 21, 21, 21, 21, 21, 21  # 1354-1367
+                  ,21, 21, 21, 21, 21, 21, 21, 20, 21, 21, 21, 20, 21, 21  # 1368-1381
+                  ,21, 20, 21, 21, 21, 20, 21, 21, 21, 20, 21, 21, 21, 20  # 1382-1395
+                  ,21, 21, 21, 20, 21, 21, 21, 20, 21, 21, 21, 20, 20, 21  # 1396-1409
+                  ,21]))                                                    # 1410
+
+JALALI_LEAP_YEARS = [1342, 1346, 1350, 1354, 1358, 1362, 1366, 1370, 1375, 1379
+                    ,1383, 1387, 1391, 1395, 1399, 1403, 1408, 1412, 1416, 1420
+                    ,1424, 1428, 1432, 1436, 1441, 1445, 1449, 1453, 1457, 1461
+                    ,1465, 1469, 1474]
+
+# (gregorian, jalali, tabular islamic) dates of sample data of Reingold and
+#  Dershowitz's Calendrical Calculations, and epoch of both calendars:
+KNOWN_DATES = [((1945, 11, 12), (1324,  8, 21), (1364, 12,  6))
+              ,((1992,  3, 17), (1370, 12, 27), (1412,  9, 13))
+              ,((1996,  2, 25), (1374, 12,  6), (1416, 10,  5))
+              ,((2038, 11, 10), (1417,  8, 19), (1460, 10, 12))
+              ,((2094,  7, 18), (1473,  4, 28), (1518,  3,  5))
+              ,(( 622,  3, 22), (   1,  1,  1), None)
+              ,(( 622,  7, 19), None,           (   1,  1,  1))]
+
+
+@pytest.mark.parametrize('year', sorted(NOWRUZ))
+def test_nowruz(year):
+    gregorian = (year + 621, 3, NOWRUZ[year])
+    assert convert((year, 1, 1), 'jalali', 'gregorian') == gregorian
+    assert convert(gregorian, 'gregorian', 'jalali') == (year, 1, 1)
+
+
+def test_jalali_leap_years():
+    years = range(JALALI_LEAP_YEARS[0], JALALI_LEAP_YEARS[-1] + 1)
+    assert [year for year in years if is_jalali_leap(year)] == JALALI_LEAP_YEARS
+    for year in years:
+        assert jalali_month_length(year, 12) == (30 if year in JALALI_LEAP_YEARS else 29)
+
+
+@pytest.mark.parametrize('gregorian, jalali, islamic', KNOWN_DATES)
+def test_known_dates(gregorian, jalali, islamic):
+    if jalali:
+        assert convert(gregorian, 'gregorian', 'jalali') == jalali
+        assert convert(jalali, 'jalali', 'gregorian') == gregorian
+    if islamic:
+        assert convert(gregorian, 'gregorian', 'islamic') == islamic
+        assert convert(islamic, 'islamic', 'gregorian') == gregorian
+
+
+def test_islamic_leap_years():
+    # 11 leap years of each 30-year cycle
+    assert [year for year in range(1, 31) if is_islamic_leap(year)] == \
+           [2, 5, 7, 10, 13, 16, 18, 21, 24, 26, 29]
+
+
+def test_jalali_years_of_supported_range():
+    # each year starts right after last day of previous one
+    for year in range(-60, 3178):
+        new_year = jalali_to_jdn(year, 1, 1)
+        assert jdn_to_jalali(new_year) == (year, 1, 1)
+        assert jdn_to_jalali(new_year - 1) == (year - 1, 12, jalali_month_length(year - 1, 12))
+    for year in (-62, 3178):
+        with pytest.raises(ValueError):
+            jalali_to_jdn(year, 1, 1)
+
+
+def test_bulk_conversions():
+    start = gregorian_to_jdn(1900, 1, 1)
+    stop = gregorian_to_jdn(2100, 1, 1)
+    days = jdn_range(start, stop)
+    for jdn, (jalali, gregorian, islamic) in zip(range(start, stop), days):
+        assert jdn_to_jalali(jdn) == jalali
+        assert jdn_to_gregorian(jdn) == gregorian
+        assert jdn_to_islamic(jdn) == islamic
+        assert islamic_to_jdn(*islamic) == jdn
+    assert jdns_to_jalali(list(range(start, stop))) == [jalali for (jalali, _, _) in days]
+    gregorian_dates = [gregorian for (_, gregorian, _) in days]
+    assert convert_many(gregorian_dates, 'gregorian', 'jalali') == [jalali for (jalali, _, _) in days]
@@ -0,0 +1,56 @@
+import os
+import sys
+import urllib.parse
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'bench'))
+
+from tir import *
+from server import FixtureServer
+
+
+class MonthServer(FixtureServer):
+    # serves recorded page of 1397/08 only for page of that month, and an
+    #  empty page for any other path
+
+    def body(self, path):
+        parts = urllib.parse.urlsplit(path)
+        query = urllib.parse.parse_qs(parts.query)
+        if parts.path == '/fa/main' and query == {'year': ['1397'], 'month': ['8']}:
+            return FixtureServer.body(self, '/')
+        return b'<html><body></body></html>'
+
+
+def test_fetch_month():
+    with MonthServer(latency=0) as server:
+        days = fetch_month(1397, 8, url=server.url)
+    assert server.requests == ['/fa/main?year=1397&month=8']
+    assert is_calendar_of(days, 1397, 8)
+
+
+def test_fetch_month_of_other_page():
+    with MonthServer(latency=0) as server:
+        with pytest.raises(Exception):
+            fetch_month(1397, 9, url=server.url)
+    assert server.requests == ['/fa/main?year=1397&month=9']
+
+
+def test_crawl_months_to_store(tmp_path):
+    store = CalendarStore(str(tmp_path / 'calendar'))
+    with MonthServer(latency=0) as server:
+        crawled = list(crawl_months([(1397, 8)], {'calendar': find_calendar}, store=store, url=server.url))
+    assert [year_month for (year_month, _) in crawled] == [(1397, 8)]
+    assert server.requests == ['/fa/main?year=1397&month=8']
+    assert list(store.month(1397, 8, today=9)) == list(crawled[0][1]['calendar'])
+
+
+def test_crawl_months_with_pool():
+    # enough pages for a pool of parsers, and same pages parsed in this process
+    months = [(1397, month) for month in range(1, 13)]
+    transformers = {'dates': find_dates, 'calendar': find_calendar}
+    with FixtureServer(latency=0) as server:
+        in_pool = list(crawl_months(months, transformers, url=server.url, processes=2))
+        in_process = list(crawl_months(months, transformers, url=server.url, processes=1))
+    assert [year_month for (year_month, _) in in_pool] == months
+    assert in_pool == in_process
@@ -0,0 +1,43 @@
+import os
+import sys
+import csv
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tir import *
+
+
+DATA = {'solar':     Date('1397', '03', "Pa'eez", '08', 'Aban', '09', '4-Shanbeh')
+       ,'gregorian': Date('2018', '03', 'Autumn', '10', 'October', '31', 'Wednesday')
+       ,'time':      Time('21', '04', '03')
+       ,'calendar':  [(1397, 8, solar_calendar(1397, 8, today=9))]
+       ,'quote':     Quote('author', 'text, with comma')}
+
+
+def test_ndjson_records():
+    records = [json.loads(line) for line in to_ndjson(DATA)]
+    types = [record['type'] for record in records]
+    assert types == ['solar', 'gregorian', 'time'] + ['day'] * 30 + ['quote']
+    assert records[0]['weekday'] == '4-Shanbeh'
+    assert records[2] == {'type': 'time', 'hour': '21', 'minute': '04', 'second': '03'}
+    today = [record for record in records if record.get('is_today')]
+    assert today == [{'type': 'day', 'year': '1397', 'month': '08', 'is_disabled': False, 'is_today': True
+                     ,'is_holiday': False, 'solar': '09', 'gregorian': '31', 'qamari': '20'}]
+    assert records[-1] == {'type': 'quote', 'author': 'author', 'text': 'text, with comma'}
+
+
+def test_csv_records():
+    rows = list(csv.DictReader(''.join(to_csv(DATA)).splitlines()))
+    assert [row['type'] for row in rows] == ['solar', 'gregorian', 'time'] + ['day'] * 30 + ['quote']
+    assert list(rows[0]) == list(RECORD_FIELDS)
+    assert (rows[1]['year'], rows[1]['month'], rows[1]['day'], rows[1]['hour']) == ('2018', '10', '31', '')
+    assert set(row['is_today'] for row in rows[3:-1]) == {'true', 'false'}
+    assert [row['solar'] for row in rows if row['is_today'] == 'true'] == ['09']
+    assert rows[-1]['text'] == 'text, with comma'
+
+
+def test_hidden_sections():
+    data = {'gregorian': DATA['gregorian'], 'quote': None}
+    assert [json.loads(line)['type'] for line in to_ndjson(data)] == ['gregorian']
+    assert len(list(to_csv({}))) == 1 # only header
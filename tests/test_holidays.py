@@ -0,0 +1,94 @@
+import os
+import sys
+import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tir import *
+
+
+# 1397/07/01 to 1397/09/30 (computed calendars, Fridays are holidays) and
+#  1397/08/13 which is a holiday too
+START = datetime.date(2018, 9, 23)
+STOP = datetime.date(2018, 12, 21)
+HOLIDAY = datetime.date(2018, 11, 4)
+MONTHS = [(1397, 7), (1397, 8), (1397, 9)]
+
+
+def make_store(file_path):
+    store = CalendarStore(file_path)
+    for (year, month) in MONTHS:
+        days = list(solar_calendar(year, month))
+        if month == 8:
+            days = [day._replace(is_holiday=True) if not day.is_disabled and day.solar == '13' else day
+                    for day in days]
+        store.put(year, month, days)
+    return store
+
+
+def dates(start, stop):
+    return [start + datetime.timedelta(days) for days in range((stop - start).days + 1)]
+
+
+def expected_holidays(start, stop):
+    return [date for date in dates(start, stop) if date.weekday() == 4 or date == HOLIDAY]
+
+
+def test_holiday_index_of_store(tmp_path):
+    index = HolidayIndex.from_store(make_store(str(tmp_path / 'calendar')))
+    holidays = expected_holidays(START, STOP)
+    assert len(index) == len(holidays)
+    assert index.holidays_between(START, STOP) == holidays
+    assert [date for date in dates(START, STOP) if index.is_holiday(date)] == holidays
+    assert not index.is_holiday(START - datetime.timedelta(1))
+
+
+def test_holiday_index_next_holidays(tmp_path):
+    index = HolidayIndex.from_store(make_store(str(tmp_path / 'calendar')))
+    assert index.next_holidays(datetime.date(2018, 11, 1), 3) == [datetime.date(2018, 11, 2)
+                                                                  ,HOLIDAY
+                                                                  ,datetime.date(2018, 11, 9)]
+    # date itself is included
+    assert index.next_holidays(HOLIDAY) == [HOLIDAY]
+    # holidays after last stored month are not known
+    assert index.next_holidays(datetime.date(2018, 12, 20), 3) == [datetime.date(2018, 12, 21)]
+
+
+def test_holiday_index_ranges(tmp_path):
+    index = HolidayIndex.from_store(make_store(str(tmp_path / 'calendar')))
+    (start, stop) = (datetime.date(2018, 10, 23), datetime.date(2018, 11, 21)) # 1397/08
+    assert len(index.holidays_between(start, stop)) == 5
+    assert index.working_days_between(start, stop) == 30 - 5
+    assert index.working_days_between(HOLIDAY, HOLIDAY) == 0
+    assert index.working_days_between(stop, start) == 0
+    assert index.holidays_between(stop, start) == []
+    assert index.covers(START, STOP)
+    assert not index.covers(START - datetime.timedelta(1), STOP)
+    assert not index.covers(START, STOP + datetime.timedelta(1))
+
+
+def test_holiday_index_save_and_load(tmp_path):
+    store = make_store(str(tmp_path / 'calendar'))
+    index_path = str(tmp_path / 'holidays')
+    saved = HolidayIndex.load(store, index_path)
+    modified = os.stat(index_path).st_mtime_ns
+    loaded = HolidayIndex.load(CalendarStore(store.file_path), index_path)
+    # read from file, store is not changed
+    assert os.stat(index_path).st_mtime_ns == modified
+    assert list(loaded.ordinals) == list(saved.ordinals)
+    assert loaded.months == set(MONTHS)
+    assert loaded.holidays_between(START, STOP) == expected_holidays(START, STOP)
+
+
+def test_holiday_index_of_truncated_file(tmp_path):
+    store = make_store(str(tmp_path / 'calendar'))
+    index_path = str(tmp_path / 'holidays')
+    saved = HolidayIndex.load(store, index_path)
+    saved_size = os.path.getsize(index_path)
+    for size in (saved_size - 4, saved_size // 2, 3, 0):
+        with open(index_path, 'r+b') as index_file:
+            index_file.truncate(size)
+        # made from store again
+        loaded = HolidayIndex.load(store, index_path)
+        assert list(loaded.ordinals) == list(saved.ordinals)
+        assert loaded.months == saved.months
@@ -0,0 +1,49 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tir import *
+
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'bench', 'fixtures', 'time.ir.html')
+TRANSFORMERS = {'dates':    find_dates
+               ,'calendar': find_calendar
+               ,'quote':    find_quote}
+
+
+class Chunks:
+    # chunks of page which remember if they are closed
+
+    def __init__(self, data, size=8192):
+        self.chunks = iter([data[offset:offset + size] for offset in range(0, len(data), size)])
+        self.closed = False
+
+    def __iter__(self):
+        return self.chunks
+
+    def close(self):
+        self.closed = True
+
+
+def page():
+    with open(FIXTURE, 'rb') as fixture:
+        return fixture.read()
+
+
+def test_streaming_parser_same_as_parser():
+    chunks = Chunks(page())
+    transformed = StreamingHTMLParser(chunks, TRANSFORMERS, SUBTREES).parse()
+    assert transformed == HTMLParser(page().decode('utf-8'), TRANSFORMERS).parse()
+    assert chunks.closed
+
+
+def test_streaming_parser_closes_chunks_on_error():
+    def broken(html, index=None):
+        raise ValueError('broken transformer')
+
+    chunks = Chunks(page())
+    with pytest.raises(ValueError):
+        StreamingHTMLParser(chunks, dict(TRANSFORMERS, calendar=broken), {broken: SUBTREES[find_calendar]}).parse()
+    assert chunks.closed
@@ -0,0 +1,74 @@
+import os
+import sys
+import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tir import *
+
+
+QUOTES = [Quote('سعدی', 'هر که را صبر نیست حکمت نیست.')
+         ,Quote('حافظ', 'در کار گلاب و گل حکم ازلی این بود')
+         ,Quote(None, 'quote without author')]
+
+
+def more_quotes(count):
+    return [Quote('author {}'.format(number), 'text {}'.format(number)) for number in range(count)]
+
+
+def test_quote_corpus_add(tmp_path):
+    corpus = QuoteCorpus(str(tmp_path / 'quotes'))
+    assert len(corpus) == 0
+    assert [corpus.add(quote) for quote in QUOTES] == [True, True, True]
+    assert [corpus.add(quote) for quote in QUOTES] == [False, False, False]
+    assert not corpus.add(None)
+    assert not corpus.add(Quote('author', None))
+    assert len(corpus) == len(QUOTES)
+    assert [corpus[offset] for offset in range(len(corpus))] == \
+           [quote._replace(author=quote.author or '') for quote in QUOTES]
+    assert all(quote in corpus for quote in QUOTES)
+
+
+def test_quote_corpus_reopen(tmp_path):
+    file_path = str(tmp_path / 'quotes')
+    corpus = QuoteCorpus(file_path)
+    corpus.add(QUOTES[0])
+    # quotes which another process adds are not added again
+    other = QuoteCorpus(file_path)
+    assert len(other) == 1
+    assert not other.add(QUOTES[0])
+    assert other.add(QUOTES[1])
+    assert not corpus.add(QUOTES[1])
+    assert len(corpus) == 2
+    assert list(QuoteCorpus(file_path)) == QUOTES[:2]
+
+
+def test_quote_corpus_half_written_record(tmp_path):
+    file_path = str(tmp_path / 'quotes')
+    QuoteCorpus(file_path).add(QUOTES[0])
+    size = os.path.getsize(file_path)
+    QuoteCorpus(file_path).add(QUOTES[1])
+    # a process has stopped while writing second quote
+    with open(file_path, 'r+b') as corpus_file:
+        corpus_file.truncate(size + 5)
+    corpus = QuoteCorpus(file_path)
+    assert len(corpus) == 1
+    assert corpus.add(QUOTES[2])
+    assert list(QuoteCorpus(file_path)) == [QUOTES[0], QUOTES[2]._replace(author='')]
+
+
+def test_quote_corpus_of_day(tmp_path):
+    file_path = str(tmp_path / 'quotes')
+    corpus = QuoteCorpus(file_path)
+    today = datetime.date(2018, 10, 31)
+    assert corpus.of_day(today) == None
+    for quote in QUOTES:
+        corpus.add(quote)
+    quote = corpus.of_day(today)
+    assert quote in corpus
+    # quotes which are added later that day do not change quote of the day
+    for other in more_quotes(20):
+        corpus.add(other)
+        assert corpus.of_day(today) == quote
+        assert QuoteCorpus(file_path).of_day(today) == quote
+    assert len(set(corpus.of_day(today + datetime.timedelta(days)) for days in range(10))) > 1
@@ -0,0 +1,24 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tir import *
+
+
+THEME = CalendarTheme(disabled   = ('\033[1;30m', '\033[0m')
+                     ,holiday    = ('\033[1;31m', '\033[0m')
+                     ,today      = ('\033[1;32m', '\033[0m')
+                     ,normal     = ('\033[1;37m', '\033[0m')
+                     ,solar      = ('\033[1;32m', '\033[0m')
+                     ,other_days = ('\033[0;37m', '\033[0m'))
+
+
+def test_render_calendar_themes():
+    import re
+    days = solar_calendar(1397, 8, today=9)
+    plain = render_calendar(days)
+    # colors of a theme do not change text of calendar
+    assert re.sub('\033\\[[0-9;]*m', '', render_calendar(days, THEME)) == plain
+    assert render_calendar(days) == plain
+    assert render_calendar(solar_calendar(1397, 8, today=10), THEME) != render_calendar(days, THEME)
@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'bench'))
+
+from tir import *
+from server import FixtureServer, FIXTURES
+
+
+MONTHS = [(1397 + (offset // 12), offset % 12 + 1) for offset in range(24)]
+
+
+def test_async_request_sessions_of_threads():
+    sessions = {}
+    stats.reset()
+    stats.enabled = True
+    with FixtureServer(latency=0.01) as server:
+        request = AsyncRequest(url=server.url, concurrency=4)
+        _get = request.request._get
+
+        def _get_of_thread(path, *args, **kwargs):
+            sessions.setdefault(threading.get_ident(), set()).add(id(request.request.session))
+            return _get(path, *args, **kwargs)
+
+        request.request._get = _get_of_thread
+        loop = asyncio.new_event_loop()
+        try:
+            pages = loop.run_until_complete(request.get_months(MONTHS))
+        finally:
+            loop.close()
+            request.close()
+        requested = list(server.requests)
+    stats.enabled = False
+    assert len(pages) == len(MONTHS)
+    assert sorted(requested) == sorted(MONTH_PATH.format(year=year, month=month)
+                                       for (year, month) in MONTHS)
+    # one session for each thread, which is not shared with other threads
+    assert all(len(ids) == 1 for ids in sessions.values())
+    assert len(set.union(*sessions.values())) == len(sessions)
+    assert stats.counters['requests'] == len(MONTHS)
+    assert stats.timers['fetch'][0] == len(MONTHS)
+    assert len(request.request.validators) == len(MONTHS)
+
+
+class BrokenMainServer(FixtureServer):
+    # main page is cut, as time.ir sometimes answers
+
+    def body(self, path):
+        if path == '/':
+            return FixtureServer.body(self, path)[:20000]
+        return FixtureServer.body(self, path)
+
+
+def get_page(server, **kwargs):
+    request = AsyncRequest(url=server.url, concurrency=2, read_timeout=10)
+    loop = asyncio.new_event_loop()
+    try:
+        start = time.perf_counter()
+        page = loop.run_until_complete(request.get_page(**kwargs))
+        return (page, time.perf_counter() - start)
+    finally:
+        loop.close()
+        request.close()
+
+
+def fixture(path):
+    with open(os.path.join(FIXTURES, path), 'rb') as fixture_file:
+        return fixture_file.read()
+
+
+def test_get_page_slow_main_page():
+    with FixtureServer(latency=0, latencies={'/': 3}) as server:
+        (page, seconds) = get_page(server)
+    assert page == fixture('fa/main')
+    assert seconds < 1
+    assert sorted(server.requests) == ['/', '/fa/main']
+
+
+def test_get_page_broken_main_page():
+    with BrokenMainServer(latency=0, latencies={'/fa/main': 0.2}) as server:
+        (page, _) = get_page(server)
+    assert page == fixture('fa/main')
+
+
+def test_get_page_main_page_first():
+    with FixtureServer(latency=0, latencies={'/fa/main': 3}) as server:
+        (transformed, seconds) = get_page(server, parse=lambda body: HTMLParser(body, {'dates': find_dates}).parse())
+    assert seconds < 1
+    assert transformed['dates']['solar'].year == '1397'
@@ -0,0 +1,105 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tir import *
+
+
+def with_holiday(days, offset):
+    return [day._replace(is_holiday=True) if index == offset else day
+            for (index, day) in enumerate(days)]
+
+
+def test_holiday_index_sees_rewritten_month(tmp_path):
+    store_path = str(tmp_path / 'calendar')
+    index_path = str(tmp_path / 'holidays')
+    days = solar_calendar(1397, 8)
+    store = CalendarStore(store_path)
+    store.put(1397, 8, days)
+    first = HolidayIndex.load(store, index_path)
+    status = os.stat(store_path)
+    # same month is rewritten in place by another process, in the same
+    #  modification time
+    other = CalendarStore(store_path)
+    other.put(1397, 8, with_holiday(days, 10))
+    os.utime(store_path, ns=(status.st_atime_ns, status.st_mtime_ns))
+    assert os.stat(store_path).st_size == status.st_size
+    second = HolidayIndex.load(store, index_path)
+    assert len(second) == len(first) + 1
+    assert HolidayIndex.load(store, index_path).ordinals == second.ordinals
+
+
+def test_store_generation(tmp_path):
+    store = CalendarStore(str(tmp_path / 'calendar'))
+    generations = [store.generation()]
+    for days in (solar_calendar(1397, 8), with_holiday(solar_calendar(1397, 8), 10)):
+        store.put(1397, 8, days)
+        generations.append(store.generation())
+    assert len(set(generations)) == 3
+    assert all(generation % 2 == 0 for generation in generations)
+    assert CalendarStore(store.file_path).generation() == generations[-1]
+
+
+def test_store_reader_waits_for_writer(tmp_path):
+    store_path = str(tmp_path / 'calendar')
+    days = solar_calendar(1397, 8)
+    CalendarStore(store_path).put(1397, 8, days)
+    reader = CalendarStore(store_path)
+    writer = CalendarStore(store_path)
+    # writer is in the middle of writing block, reader should not use it
+    #  until writer is done
+    writing = writer.generation() | 1
+    writer._set_generation(writing)
+    offset = writer.index[(1397, 8)] + 10
+    block = bytes(writer._map[offset:offset + 10])
+    writer._map[offset:offset + 10] = b'\xff' * 10
+
+    def finish():
+        writer._map[offset:offset + 10] = block
+        writer._set_generation(writing + 1)
+
+    timer = threading.Timer(0.02, finish)
+    timer.start()
+    try:
+        assert list(reader.month(1397, 8)) == days
+    finally:
+        timer.join()
+
+
+def test_store_replaced_by_another_process(tmp_path):
+    store_path = str(tmp_path / 'calendar')
+    days = solar_calendar(1397, 8)
+    reader = CalendarStore(store_path)
+    reader.put(1397, 7, solar_calendar(1397, 7))
+    # another version of store is replaced by a new one in another process,
+    #  which has same size as the old one
+    with open(store_path, 'r+b') as store_file:
+        store_file.seek(4)
+        store_file.write(b'\x01')
+    other = CalendarStore(store_path)
+    other.put(1397, 8, days)
+    assert os.stat(store_path).st_size == reader._map.size()
+    reader.refresh()
+    assert reader.months() == [(1397, 8)]
+    assert list(reader.month(1397, 8)) == days
+
+
+def test_store_is_created_under_lock(tmp_path):
+    store_path = str(tmp_path / 'calendar')
+    days = solar_calendar(1397, 8)
+    stored = CalendarStore(str(tmp_path / 'stored'))
+    stored.put(1397, 8, days)
+    opened = []
+    # another process holds the lock while it creates store and puts a month,
+    #  a new store should not replace its month
+    with FileLock(store_path + '.lock'):
+        thread = threading.Thread(target=lambda: opened.append(CalendarStore(store_path)))
+        thread.start()
+        thread.join(0.2)
+        assert thread.is_alive()
+        os.replace(stored.file_path, store_path)
+    thread.join()
+    assert opened[0].months() == [(1397, 8)]
+    assert list(opened[0].month(1397, 8)) == days
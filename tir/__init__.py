@@ -5,4 +5,15 @@ __description__ = "have time.ir in terminal"
 __author__      = "Pouriya Jahanbakhsh"
 __email__       = "pouriya.jahanbakhsh@gmail.com"
 
+from .stats import *
 from .tir import *
+from .transformers import *
+from .month import *
+from .cache import *
+from .store import *
+from .holidays import *
+from .quotes import *
+from .calendars import *
+from .render import *
+from .formats import *
+from .crawl import *
@@ -0,0 +1,134 @@
+import os
+import json
+import time
+from .tir import Date, Day, Time, Quote
+from .month import Month
+
+
+# version of cached transformers' data, should be increased when a
+#  transformer or one of named tuples changes.
+CACHE_VERSION = 1
+
+# named tuples are stored as {name: [field1, field2, ...]} in JSON:
+_cache_types = {'Date':  Date
+               ,'Day':   Day
+               ,'Time':  Time
+               ,'Quote': Quote}
+
+
+def dump_transformed(transformed, validators=None, hashes=None):
+    # returns one line of JSON for transformers' data with string names,
+    #  validators of Request which fetched its page and hashes of subtrees
+    #  which transformers used (see StreamingHTMLParser)
+    return json.dumps({'version':    CACHE_VERSION
+                      ,'validators': validators or {}
+                      ,'hashes':     hashes or {}
+                      ,'data':       _encode(transformed)}
+                     ,ensure_ascii=False
+                     ,separators=(',', ':'))
+
+
+def load_transformed(line):
+    # returns (data, validators, hashes), data is None if line is not dumped
+    #  by same CACHE_VERSION
+    try:
+        cached = json.loads(line)
+    except ValueError:
+        return (None, {}, {})
+    if type(cached) != dict or cached.get('version') != CACHE_VERSION:
+        return (None, {}, {})
+    return (_decode(cached['data']), cached.get('validators', {}), cached.get('hashes', {}))
+
+
+def _encode(data):
+    if isinstance(data, tuple) and type(data).__name__ in _cache_types:
+        return {type(data).__name__: [_encode(item) for item in data]}
+    if type(data) == dict:
+        return {name: _encode(item) for name, item in data.items()}
+    if type(data) == list or isinstance(data, Month):
+        return [_encode(item) for item in data]
+    return data
+
+
+def _decode(data):
+    if type(data) == dict:
+        if len(data) == 1:
+            (name, fields) = list(data.items())[0]
+            if name in _cache_types:
+                return _cache_types[name](*[_decode(item) for item in fields])
+        return {name: _decode(item) for name, item in data.items()}
+    if type(data) == list:
+        return [_decode(item) for item in data]
+    return data
+
+
+def write_atomic(file_path, data):
+    # writes data (str or bytes) to a temporary file next to file_path and
+    #  renames it to file_path, so readers see old or new content and never
+    #  a part of it
+    import tempfile
+    (directory, name) = os.path.split(os.path.abspath(file_path))
+    (descriptor, temporary_path) = tempfile.mkstemp(prefix='.' + name + '.', dir=directory)
+    try:
+        with os.fdopen(descriptor, 'wb') as temporary_file:
+            if isinstance(data, str):
+                data = data.encode('utf-8')
+            temporary_file.write(data)
+        os.replace(temporary_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temporary_path)
+        except OSError:
+            pass
+        raise
+
+
+# An advisory lock between processes on file_path (which is created if it
+#  does not exist), e.g. for letting one process refresh a cache while others
+#  wait for it. Lock is released by release(), closing its file or exiting
+#  process. On systems without fcntl, acquire() always succeeds.
+
+class FileLock:
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._file = None
+
+
+    def acquire(self, timeout=None):
+        # waits for lock for timeout seconds (forever if it's None), returns
+        #  True if lock is acquired
+        try:
+            import fcntl
+        except ImportError:
+            return True
+        if self._file != None:
+            return True
+        lock_file = open(self.file_path, 'a')
+        deadline = None if timeout == None else time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                self._file = lock_file
+                return True
+            except BlockingIOError:
+                if deadline != None and time.monotonic() >= deadline:
+                    lock_file.close()
+                    return False
+                time.sleep(0.05)
+
+
+    def release(self):
+        if self._file != None:
+            self._file.close()
+            self._file = None
+
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+
+    def __exit__(self, *args):
+        self.release()
+        return False
@@ -0,0 +1,296 @@
+import bisect
+import datetime
+from functools import lru_cache
+from .tir import Date, Day, find_season
+
+
+# Arithmetic conversion between solar hijri (jalali), gregorian and tabular
+#  islamic (qamari) calendars. All of them convert through Julian Day Number
+#  (JDN) of date. Dates are (year, month, day) tuples of integers.
+# Jalali conversion is Borkowski's algorithm which uses years where 33-year
+#  leap cycle breaks and matches official Iranian calendar for years
+#  -61 to 3177. Tabular islamic calendar may differ from moon-sighted qamari
+#  dates of time.ir by a day or two.
+
+_JALALI_BREAKS = [-61, 9, 38, 199, 426, 686, 756, 818, 1111, 1181, 1210, 1635
+                 ,2060, 2097, 2192, 2262, 2324, 2394, 2456, 3178]
+
+_ISLAMIC_EPOCH = 1948439 # JDN of day before 1/1/1 (16 July 622 julian)
+_ORDINAL_OFFSET = 1721425 # JDN of day before 1/1/1 gregorian
+
+SOLAR_MONTH_NAMES = ['Farvardin', 'Ordibehesht', 'Khordad', 'Tir', 'Mordad', 'Shahrivar'
+                    ,'Mehr', 'Aban', 'Azar', 'Dey', 'Bahman', 'Esfand']
+SOLAR_WEEKDAY_NAMES = ['Shanbeh', '1-Shanbeh', '2-Shanbeh', '3-Shanbeh', '4-Shanbeh'
+                      ,'5-Shanbeh', 'Jom\'eh']
+GREGORIAN_MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June', 'July'
+                        ,'August', 'September', 'October', 'November', 'December']
+GREGORIAN_WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday'
+                          ,'Saturday', 'Sunday']
+
+# integer division and remainder which truncate toward zero like C, which
+#  algorithm is written with:
+
+def _div(a, b):
+    quotient = abs(a) // abs(b)
+    if (a < 0) != (b < 0):
+        return -quotient
+    return quotient
+
+
+def _mod(a, b):
+    return a - _div(a, b) * b
+
+
+@lru_cache(maxsize=None)
+def _jalali_year(year):
+    # returns (leap, gregorian year, day of March which is 1 Farvardin)
+    # leap is number of years since last leap year, 0 for leap years
+    if not _JALALI_BREAKS[0] <= year < _JALALI_BREAKS[-1]:
+        raise ValueError('jalali year {!r} is out of range'.format(year))
+    gregorian_year = year + 621
+    leap_jalali = -14
+    jp = _JALALI_BREAKS[0]
+    for jm in _JALALI_BREAKS[1:]:
+        jump = jm - jp
+        if year < jm:
+            break
+        leap_jalali += _div(jump, 33) * 8 + _div(_mod(jump, 33), 4)
+        jp = jm
+    n = year - jp
+    leap_jalali += _div(n, 33) * 8 + _div(_mod(n, 33) + 3, 4)
+    if _mod(jump, 33) == 4 and jump - n == 4:
+        leap_jalali += 1
+    leap_gregorian = _div(gregorian_year, 4) - _div((_div(gregorian_year, 100) + 1) * 3, 4) - 150
+    march = 20 + leap_jalali - leap_gregorian
+    if jump - n < 6:
+        n = n - jump + _div(jump + 4, 33) * 33
+    leap = _mod(_mod(n + 1, 33) - 1, 4)
+    if leap == -1:
+        leap = 4
+    return (leap, gregorian_year, march)
+
+
+@lru_cache(maxsize=None)
+def _jalali_new_year(year):
+    # JDN of 1 Farvardin
+    (_, gregorian_year, march) = _jalali_year(year)
+    return gregorian_to_jdn(gregorian_year, 3, march)
+
+
+def is_jalali_leap(year):
+    return _jalali_year(year)[0] == 0
+
+
+def jalali_month_length(year, month):
+    if month < 7:
+        return 31
+    if month < 12 or is_jalali_leap(year):
+        return 30
+    return 29
+
+
+def gregorian_to_jdn(year, month, day):
+    return datetime.date(year, month, day).toordinal() + _ORDINAL_OFFSET
+
+
+def jdn_to_gregorian(jdn):
+    date = datetime.date.fromordinal(jdn - _ORDINAL_OFFSET)
+    return (date.year, date.month, date.day)
+
+
+def jalali_to_jdn(year, month, day):
+    return _jalali_new_year(year) + (month - 1) * 31 - _div(month, 7) * (month - 7) + day - 1
+
+
+def jdn_to_jalali(jdn):
+    year = jdn_to_gregorian(jdn)[0] - 621
+    days = jdn - _jalali_new_year(year)
+    if days < 0:
+        year -= 1
+        days = jdn - _jalali_new_year(year)
+    if days < 186:
+        return (year, 1 + days // 31, 1 + days % 31)
+    days -= 186
+    return (year, 7 + days // 30, 1 + days % 30)
+
+
+def is_islamic_leap(year):
+    return (14 + 11 * year) % 30 < 11
+
+
+def islamic_month_length(year, month):
+    if month % 2 or (month == 12 and is_islamic_leap(year)):
+        return 30
+    return 29
+
+
+def islamic_to_jdn(year, month, day):
+    return day + (59 * (month - 1) + 1) // 2 + (year - 1) * 354 + (3 + 11 * year) // 30 + _ISLAMIC_EPOCH
+
+
+def jdn_to_islamic(jdn):
+    year = (30 * (jdn - _ISLAMIC_EPOCH - 1) + 10646) // 10631
+    month = min(12, -(-2 * (jdn - 29 - islamic_to_jdn(year, 1, 1)) // 59) + 1)
+    day = jdn - islamic_to_jdn(year, month, 1) + 1
+    return (year, month, day)
+
+
+_to_jdn = {'jalali':    jalali_to_jdn
+          ,'gregorian': gregorian_to_jdn
+          ,'islamic':   islamic_to_jdn}
+
+_from_jdn = {'jalali':    jdn_to_jalali
+            ,'gregorian': jdn_to_gregorian
+            ,'islamic':   jdn_to_islamic}
+
+
+def convert(date, source, target):
+    # e.g. convert((1397, 8, 9), 'jalali', 'gregorian') == (2018, 10, 31)
+    return _from_jdn[target](_to_jdn[source](*date))
+
+
+def convert_many(dates, source, target):
+    # bulk version of convert() for a sequence of dates
+    to_jdn = _to_jdn[source]
+    jdns = [to_jdn(year, month, day) for (year, month, day) in dates]
+    if target == 'jalali':
+        return jdns_to_jalali(jdns)
+    from_jdn = _from_jdn[target]
+    return [from_jdn(jdn) for jdn in jdns]
+
+
+def jdns_to_jalali(jdns):
+    # bulk version of jdn_to_jalali(), year of each date is found by a binary
+    #  search in first days of all years of dates instead of converting each
+    #  one to gregorian first
+    if not jdns:
+        return []
+    first_year = jdn_to_jalali(min(jdns))[0]
+    last_year = jdn_to_jalali(max(jdns))[0]
+    new_years = [_jalali_new_year(year) for year in range(first_year, last_year + 1)]
+    result = []
+    for jdn in jdns:
+        offset = bisect.bisect_right(new_years, jdn) - 1
+        days = jdn - new_years[offset]
+        if days < 186:
+            result.append((first_year + offset, 1 + days // 31, 1 + days % 31))
+        else:
+            days -= 186
+            result.append((first_year + offset, 7 + days // 30, 1 + days % 30))
+    return result
+
+
+def jdn_range(start, stop):
+    # jalali, gregorian and islamic dates of consecutive days [start, stop)
+    #  which are calculated incrementally instead of one by one
+    if stop <= start:
+        return []
+    result = []
+    jalali = list(jdn_to_jalali(start))
+    gregorian = datetime.date.fromordinal(start - _ORDINAL_OFFSET)
+    islamic = list(jdn_to_islamic(start))
+    one_day = datetime.timedelta(days=1)
+    for jdn in range(start, stop):
+        result.append((tuple(jalali), (gregorian.year, gregorian.month, gregorian.day), tuple(islamic)))
+        gregorian += one_day
+        jalali[2] += 1
+        if jalali[2] > jalali_month_length(jalali[0], jalali[1]):
+            jalali[2] = 1
+            jalali[1] += 1
+            if jalali[1] > 12:
+                (jalali[0], jalali[1]) = (jalali[0] + 1, 1)
+        islamic[2] += 1
+        if islamic[2] > islamic_month_length(islamic[0], islamic[1]):
+            islamic[2] = 1
+            islamic[1] += 1
+            if islamic[1] > 12:
+                (islamic[0], islamic[1]) = (islamic[0] + 1, 1)
+    return result
+
+def solar_months(start, stop):
+    # (year, month) of solar months which have days of gregorian dates
+    #  start to stop (both included)
+    (year, month, _) = jdn_to_jalali(gregorian_to_jdn(start.year, start.month, start.day))
+    last = jdn_to_jalali(gregorian_to_jdn(stop.year, stop.month, stop.day))[:2]
+    while (year, month) <= last:
+        yield (year, month)
+        (year, month) = (year + month // 12, month % 12 + 1)
+
+# Same data that find_dates and find_calendar transformers scrape from
+#  time.ir, except holidays other than Fridays which are not computable:
+
+def solar_dates(date=None):
+    if date == None:
+        date = datetime.date.today()
+    (year, month, day) = jdn_to_jalali(gregorian_to_jdn(date.year, date.month, date.day))
+    (season_name, season) = find_season(month, 'solar')
+    solar = Date(year        = str(year)
+                ,season      = season
+                ,season_name = season_name
+                ,month       = '{:02d}'.format(month)
+                ,month_name  = SOLAR_MONTH_NAMES[month - 1]
+                ,day         = '{:02d}'.format(day)
+                ,weekday     = SOLAR_WEEKDAY_NAMES[(date.weekday() + 2) % 7])
+    (season_name, season) = find_season(date.month, 'gregorian')
+    gregorian = Date(year        = str(date.year)
+                    ,season      = season
+                    ,season_name = season_name
+                    ,month       = '{:02d}'.format(date.month)
+                    ,month_name  = GREGORIAN_MONTH_NAMES[date.month - 1]
+                    ,day         = '{:02d}'.format(date.day)
+                    ,weekday     = GREGORIAN_WEEKDAY_NAMES[date.weekday()])
+    return {'solar': solar, 'gregorian': gregorian}
+
+
+def solar_calendar(year, month, today=None):
+    # grid of a solar month which starts from Saturday, days of previous and
+    #  next months are disabled. today is solar day number of month.
+    (year, month) = (int(year), int(month))
+    first = jalali_to_jdn(year, month, 1)
+    length = jalali_month_length(year, month)
+    lead = (first + 2) % 7 # JDN % 7 is 0 for Monday
+    count = 35
+    if lead + length > 35:
+        count = 42
+    start = first - lead
+    days = []
+    for offset, (jalali, gregorian, islamic) in enumerate(jdn_range(start, start + count)):
+        is_disabled = not lead <= offset < lead + length
+        days.append(Day(is_disabled
+                       ,not is_disabled and today != None and jalali[2] == int(today)
+                       ,offset % 7 == 6
+                       ,'{:02d}'.format(jalali[2])
+                       ,'{:02d}'.format(gregorian[2])
+                       ,'{:02d}'.format(islamic[2])))
+    return days
+
+
+def month_calendars(months, store=None, today=None):
+    # yields (year, month, days) for each solar (year, month) of months.
+    # Calendar of a month is read from store (a CalendarStore) if it's
+    #  there, otherwise it's computed and only Fridays are holidays.
+    # today is solar (year, month, day) which should be marked.
+    for (year, month) in months:
+        (year, month) = (int(year), int(month))
+        day = None
+        if today != None and (int(today[0]), int(today[1])) == (year, month):
+            day = int(today[2])
+        days = None
+        if store != None:
+            days = store.month(year, month, today=day)
+        if days == None:
+            days = solar_calendar(year, month, today=day)
+        yield (year, month, days)
+
+
+def is_calendar_of(days, year, month):
+    # checks if days (e.g. which find_calendar scraped from page of a month)
+    #  is grid of solar month year/month
+    expected = solar_calendar(year, month)
+    if len(days) != len(expected):
+        return False
+    for (day, expected_day) in zip(days, expected):
+        if (day.is_disabled, day.solar, day.gregorian) != \
+           (expected_day.is_disabled, expected_day.solar, expected_day.gregorian):
+            return False
+    return True
@@ -0,0 +1,100 @@
+from .stats import stats
+from .tir import Request, AsyncRequest, HTMLParser
+from .transformers import find_calendar
+from .calendars import is_calendar_of
+
+
+# Bulk crawl of pages of solar months, e.g. for backfilling calendars of
+#  several years. Pages are fetched by AsyncRequest (at most concurrency at
+#  the same time) and each one is parsed in a pool of processes as soon as
+#  it arrives, so parsing of pages scales with number of cores instead of
+#  running in one thread. Workers of pool are started by a fork server (or
+#  spawned), not forked from this process while threads of AsyncRequest are
+#  running. A pool is not worth starting for a few pages or one process (e.g.
+#  on a machine with one CPU), and then pages are parsed in this process:
+#
+#   for ((year, month), transformed) in crawl_months([(1397, 1), (1397, 2)]
+#                                                  ,{'calendar': find_calendar}
+#                                                  ,store=store):
+#       ...
+#
+# Results are yielded in order of months, and if store is given, calendar of
+#  each month is put in it once it's ready. transformers should be picklable
+#  (e.g. functions of a module) to be sent to other processes.
+
+_POOL_MIN_MONTHS = 12 # fewer pages are parsed in this process
+
+
+def parse_page(text, transformers):
+    return HTMLParser(text, transformers).parse()
+
+
+def fetch_month(year, month, **kwargs):
+    # calendar of one solar month from its page, e.g. for prefetching next
+    #  month. kwargs are passed to Request (e.g. url, read_timeout).
+    (year, month) = (int(year), int(month))
+    request = Request(**kwargs)
+    try:
+        text = request.get_month(year, month)
+    finally:
+        request.close()
+    days = parse_page(text, {'calendar': find_calendar})['calendar']
+    if not is_calendar_of(days, year, month):
+        raise ValueError('page is not calendar of {}/{:02d}'.format(year, month))
+    return days
+
+
+def crawl_months(months
+                ,transformers
+                ,store=None
+                ,concurrency=4
+                ,processes=None
+                ,**kwargs):
+    # kwargs are passed to AsyncRequest (e.g. url, read_timeout), processes
+    #  is size of pool of parsers (default: number of CPUs)
+    import os
+    import asyncio
+    months = [(int(year), int(month)) for (year, month) in months]
+    if processes == None:
+        processes = os.cpu_count() or 1
+    pool = None
+    if processes > 1 and len(months) >= _POOL_MIN_MONTHS:
+        pool = _parsers(processes)
+    request = AsyncRequest(concurrency=concurrency, **kwargs)
+    loop = asyncio.new_event_loop()
+
+    async def crawl(year, month):
+        text = await request.get(request.month_path.format(year=year, month=month))
+        if pool == None:
+            return parse_page(text, transformers)
+        return await loop.run_in_executor(pool, parse_page, text, transformers)
+
+    tasks = [loop.create_task(crawl(year, month)) for (year, month) in months]
+    try:
+        for ((year, month), task) in zip(months, tasks):
+            with stats.timer('crawl'):
+                transformed = loop.run_until_complete(task)
+            stats.count('months')
+            if store != None and 'calendar' in transformed:
+                if not is_calendar_of(transformed['calendar'], year, month):
+                    raise ValueError('page is not calendar of {}/{:02d}'.format(year, month))
+                store.put(year, month, transformed['calendar'])
+            yield ((year, month), transformed)
+    finally:
+        for task in tasks:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        loop.close()
+        if pool != None:
+            pool.shutdown(cancel_futures=True)
+        request.close()
+
+
+def _parsers(processes):
+    import multiprocessing
+    import concurrent.futures
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+    else:
+        context = multiprocessing.get_context('spawn')
+    return concurrent.futures.ProcessPoolExecutor(processes, mp_context=context)
@@ -0,0 +1,95 @@
+import json
+from .tir import Date, Day, Time, Quote
+from .month import Month
+
+
+# Machine-readable forms of transformers' data (Date, Day, Time and Quote
+#  named tuples) for scripts, instead of rendered text. data maps names of
+#  sections ('solar', 'gregorian', 'time', 'calendar' and 'quote') to their
+#  data, and sections which are not in it are not written:
+#  JSON:   one object, named tuples are objects with same fields
+#  NDJSON: an object for each record per line
+#  CSV:    a row for each record after a header row of RECORD_FIELDS, fields
+#          which a record does not have are empty
+# Records are solar and gregorian dates, time, each day of calendars and
+#  quote, in this order, and the first field of each record is its type
+#  ('solar', 'gregorian', 'time', 'day' or 'quote'). For NDJSON and CSV,
+#  calendar is (year, month, days) of each month (e.g. which month_calendars
+#  yields), disabled days (of previous and next months in grid of a month)
+#  are skipped and an unknown quote (None) is not written. Lines are yielded
+#  one by one, so a long range of months is written while it's being read.
+# Booleans are written as true and false in CSV, same as JSON.
+
+DAY_FIELDS = ('year', 'month') + Day._fields
+# day records use year and month fields of dates:
+RECORD_FIELDS = ('type',) + Date._fields + Time._fields + Day._fields + Quote._fields
+
+
+def to_json(data):
+    return json.dumps(_plain(data), ensure_ascii=False)
+
+
+def _plain(data):
+    if isinstance(data, tuple) and hasattr(data, '_asdict'):
+        return {name: _plain(item) for name, item in data._asdict().items()}
+    if type(data) == dict:
+        return {name: _plain(item) for name, item in data.items()}
+    if type(data) == list or isinstance(data, Month):
+        return [_plain(item) for item in data]
+    return data
+
+
+def day_rows(calendars):
+    # yields (year, month, is_disabled, is_today, ...) for each day
+    for (year, month, days) in calendars:
+        (year, month) = (str(int(year)), '{:02d}'.format(int(month)))
+        for day in days:
+            if not day.is_disabled:
+                yield (year, month) + tuple(day)
+
+
+def records(data):
+    # yields (type, {field: value}) of each record of data
+    for name in ('solar', 'gregorian'):
+        if name in data:
+            yield (name, data[name]._asdict())
+    if 'time' in data:
+        yield ('time', data['time']._asdict())
+    if 'calendar' in data:
+        for row in day_rows(data['calendar']):
+            yield ('day', dict(zip(DAY_FIELDS, row)))
+    if data.get('quote') != None:
+        yield ('quote', data['quote']._asdict())
+
+
+def to_ndjson(data):
+    for (record_type, fields) in records(data):
+        record = {'type': record_type}
+        record.update(fields)
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def to_csv(data):
+    import io
+    import csv
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator='\n')
+
+    def flush():
+        text = output.getvalue()
+        output.seek(0)
+        output.truncate()
+        return text
+
+    writer.writerow(RECORD_FIELDS)
+    yield flush()
+    for (record_type, fields) in records(data):
+        fields['type'] = record_type
+        writer.writerow([_csv_value(fields.get(field)) for field in RECORD_FIELDS])
+        yield flush()
+
+
+def _csv_value(value):
+    if type(value) == bool:
+        return 'true' if value else 'false'
+    return value
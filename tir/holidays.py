@@ -0,0 +1,130 @@
+import bisect
+import struct
+import datetime
+from array import array
+from .calendars import jalali_to_jdn, jdn_to_gregorian, solar_months
+from .cache import write_atomic
+
+
+# An index of holidays of calendars which are kept in a CalendarStore, for
+#  answering questions like next holidays or working days between two dates
+#  without reading or parsing any month. Holidays are kept as a sorted array
+#  of ordinals of their gregorian dates (date.toordinal()) and are found by
+#  binary search.
+# Only holidays of months which are in store are known (see crawl_months),
+#  covers() tells if all months of a range of dates are in index.
+# Index is saved in a file with inode, size and generation of its store (see
+#  CalendarStore), and is loaded from it until store changes:
+#
+#   index = HolidayIndex.load(store, '~/.cache/.tir_holidays')
+#   index.next_holidays(datetime.date.today(), 3)
+
+_INDEX_MAGIC = b'TIRH'
+_INDEX_VERSION = 2
+_INDEX_HEADER = struct.Struct('<4sBQQIII') # magic, version, store inode, size
+                                           #  and generation, number of months
+                                           #  and holidays
+
+
+class HolidayIndex:
+
+    def __init__(self, ordinals=(), months=()):
+        self.ordinals = array('i', sorted(ordinals))
+        self.months = set(months) # (solar year, month) of months which are known
+
+
+    @classmethod
+    def from_store(cls, store):
+        ordinals = []
+        for (year, month) in store.months():
+            days = store.month(year, month)
+            first_day = datetime.date(*jdn_to_gregorian(jalali_to_jdn(year, month, 1))).toordinal()
+            for offset in days.holidays():
+                ordinals.append(first_day + int(days[offset].solar) - 1)
+        return cls(ordinals, store.months())
+
+
+    @classmethod
+    def load(cls, store, file_path):
+        # index of store from file, or from store if file is not made from
+        #  its current content (then index is saved in file)
+        signature = store.signature()
+        try:
+            with open(file_path, 'rb') as index_file:
+                data = index_file.read()
+            (magic, version, inode, size, generation, months, holidays) = _INDEX_HEADER.unpack_from(data)
+            if (magic, version, inode, size, generation) == (_INDEX_MAGIC, _INDEX_VERSION) + signature and \
+               len(data) == _INDEX_HEADER.size + (months + holidays) * 4: # not truncated
+                offset = _INDEX_HEADER.size
+                month_items = array('H', data[offset:offset + months * 4])
+                offset += months * 4
+                index = cls()
+                index.ordinals = array('i', data[offset:offset + holidays * 4])
+                index.months = set(zip(month_items[0::2], month_items[1::2]))
+                return index
+        except (OSError, struct.error, ValueError):
+            pass
+        index = cls.from_store(store)
+        index.save(file_path, signature)
+        return index
+
+
+    def save(self, file_path, signature=(0, 0, 0)):
+        month_items = array('H')
+        for (year, month) in sorted(self.months):
+            month_items.extend((year, month))
+        write_atomic(file_path
+                    ,_INDEX_HEADER.pack(_INDEX_MAGIC
+                                       ,_INDEX_VERSION
+                                       ,*signature
+                                       ,len(self.months)
+                                       ,len(self.ordinals)) +
+                     month_items.tobytes() +
+                     self.ordinals.tobytes())
+
+
+    def __len__(self):
+        return len(self.ordinals)
+
+
+    def covers(self, start, stop):
+        # checks if holidays of all dates from start to stop are known
+        for year_month in solar_months(start, stop):
+            if year_month not in self.months:
+                return False
+        return True
+
+
+    def is_holiday(self, date):
+        ordinal = date.toordinal()
+        offset = bisect.bisect_left(self.ordinals, ordinal)
+        return offset < len(self.ordinals) and self.ordinals[offset] == ordinal
+
+
+    def next_holidays(self, date, count=1):
+        # count holidays from date (included)
+        offset = bisect.bisect_left(self.ordinals, date.toordinal())
+        return [datetime.date.fromordinal(ordinal)
+                for ordinal in self.ordinals[offset:offset + count]]
+
+
+    def holidays_between(self, start, stop):
+        # holidays from start to stop (both included)
+        (first, last) = self._offsets(start, stop)
+        return [datetime.date.fromordinal(ordinal) for ordinal in self.ordinals[first:last]]
+
+
+    def working_days_between(self, start, stop):
+        # number of days from start to stop (both included) which are not
+        #  holidays
+        days = stop.toordinal() - start.toordinal() + 1
+        if days <= 0:
+            return 0
+        (first, last) = self._offsets(start, stop)
+        return days - (last - first)
+
+
+    def _offsets(self, start, stop):
+        return (bisect.bisect_left(self.ordinals, start.toordinal())
+               ,bisect.bisect_right(self.ordinals, stop.toordinal()))
+
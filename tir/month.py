@@ -0,0 +1,104 @@
+from array import array
+from .tir import Day
+
+
+# A compact calendar grid of a month, for keeping many months in memory.
+# Instead of a list of Day tuples with a string or boolean object for each
+#  field, flags (disabled, holiday and today bits) and solar, gregorian and
+#  qamari day numbers of all cells are kept as columns of one array of
+#  bytes. It's a sequence of Day, so code which works with a list of Day
+#  (e.g. render_calendar or holiday notifications) works with it too, and
+#  each Day is made when it's read.
+
+DISABLED = 1
+HOLIDAY  = 2
+TODAY    = 4
+
+_NUMBERS = ['{:02d}'.format(number) for number in range(256)]
+
+
+class Month:
+
+    __slots__ = ('count', 'cells')
+
+    def __init__(self, flags=(), solar=(), gregorian=(), qamari=()):
+        # each argument is a column of numbers with one item for each cell
+        self.count = len(flags)
+        self.cells = array('B', flags)
+        for column in (solar, gregorian, qamari):
+            if len(column) != self.count:
+                raise ValueError('columns of month should have {} cells'.format(self.count))
+            self.cells.extend(column)
+
+
+    @classmethod
+    def from_days(cls, days):
+        flags = []
+        for day in days:
+            flags.append((day.is_disabled and DISABLED)
+                         | (day.is_holiday and HOLIDAY)
+                         | (day.is_today and TODAY))
+        return cls(flags
+                  ,[int(day.solar) for day in days]
+                  ,[int(day.gregorian) for day in days]
+                  ,[int(day.qamari) for day in days])
+
+
+    @classmethod
+    def from_cells(cls, data, today=None):
+        # data is (flags, solar, gregorian, qamari) bytes of each cell after
+        #  each other, as CalendarStore keeps them. today is offset of the
+        #  cell which should be marked as today.
+        flags = bytearray(data[0::4])
+        if today != None and 0 <= today < len(flags) and not flags[today] & DISABLED:
+            flags[today] |= TODAY
+        return cls(flags, data[1::4], data[2::4], data[3::4])
+
+
+    def __len__(self):
+        return self.count
+
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[offset] for offset in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError('month has {} cells'.format(self.count))
+        (cells, count) = (self.cells, self.count)
+        flags = cells[index]
+        return Day(bool(flags & DISABLED)
+                  ,bool(flags & TODAY)
+                  ,bool(flags & HOLIDAY)
+                  ,_NUMBERS[cells[count + index]]
+                  ,_NUMBERS[cells[2 * count + index]]
+                  ,_NUMBERS[cells[3 * count + index]])
+
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self[index]
+
+
+    def __eq__(self, other):
+        if isinstance(other, Month):
+            return self.cells == other.cells
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return NotImplemented
+
+
+    def __repr__(self):
+        return 'Month({!r})'.format(list(self))
+
+
+    def flags(self):
+        return self.cells[:self.count]
+
+
+    def holidays(self):
+        # offsets of cells which are holidays of this month
+        return [offset for offset, flags in enumerate(self.flags())
+                if flags & HOLIDAY and not flags & DISABLED]
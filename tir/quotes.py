@@ -0,0 +1,154 @@
+import struct
+import hashlib
+from array import array
+from .tir import Quote
+from .cache import FileLock, write_atomic
+
+
+# A local corpus of quotes which find_quote has scraped, for choosing a
+#  quote without fetching time.ir.
+# File starts with a header and then has one record for each quote, which
+#  is appended once it's added:
+#  record header: first 8 bytes of SHA-1 of payload, size of payload
+#  payload:       author and text of quote in UTF-8, separated by null
+# Offsets of records are indexed when file is read (by skipping from a
+#  record header to the next one) and a quote is decoded only when it's
+#  read. Hashes of records are used to add each quote once.
+# Quote of a day is chosen from quotes which are in corpus when it's asked
+#  first, and its offset is kept with date in file_path + '.day', so it does
+#  not change when quotes are added later that day.
+
+_CORPUS_MAGIC = b'TIRQ'
+_CORPUS_VERSION = 1
+_CORPUS_HEADER = struct.Struct('<4sB')
+_RECORD_HEADER = struct.Struct('<8sH')
+
+
+class QuoteCorpus:
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._data = None
+        self._offsets = None # offset of payload of each quote
+        self._hashes = None
+
+
+    def _load(self):
+        if self._data == None:
+            try:
+                with open(self.file_path, 'rb') as corpus_file:
+                    data = corpus_file.read()
+            except FileNotFoundError:
+                data = b''
+            self._index(data)
+        return self._data
+
+
+    def _index(self, data):
+        (offsets, hashes) = (array('I'), set())
+        if len(data) < _CORPUS_HEADER.size or \
+           _CORPUS_HEADER.unpack_from(data) != (_CORPUS_MAGIC, _CORPUS_VERSION):
+            data = b'' # another version of corpus, it's started over on add()
+        end = _CORPUS_HEADER.size if data else 0 # of last whole record
+        while end + _RECORD_HEADER.size <= len(data):
+            (digest, size) = _RECORD_HEADER.unpack_from(data, end)
+            offset = end + _RECORD_HEADER.size
+            if offset + size > len(data): # a half-written record
+                break
+            offsets.append(offset)
+            hashes.add(digest)
+            end = offset + size
+        (self._data, self._offsets, self._hashes) = (data[:end], offsets, hashes)
+
+
+    def __len__(self):
+        self._load()
+        return len(self._offsets)
+
+
+    def __contains__(self, quote):
+        self._load()
+        return _digest(_payload(quote)) in self._hashes
+
+
+    def __getitem__(self, index):
+        data = self._load()
+        offset = self._offsets[index]
+        size = _RECORD_HEADER.unpack_from(data, offset - _RECORD_HEADER.size)[1]
+        (author, _, text) = data[offset:offset + size].decode('utf-8').partition('\0')
+        return Quote(author, text)
+
+
+    def add(self, quote):
+        # appends quote if it's not in corpus, returns True if it's added
+        if quote == None or quote.text == None:
+            return False
+        payload = _payload(quote)
+        if len(payload) > 0xffff:
+            raise ValueError('quote is too long for corpus')
+        digest = _digest(payload)
+        if self._hashes != None and digest in self._hashes:
+            return False
+        with FileLock(self.file_path + '.lock'):
+            # quotes which other processes have added are read again:
+            self._data = None
+            data = self._load()
+            if digest in self._hashes:
+                return False
+            record = _RECORD_HEADER.pack(digest, len(payload)) + payload
+            if not data:
+                data = _CORPUS_HEADER.pack(_CORPUS_MAGIC, _CORPUS_VERSION)
+                with open(self.file_path, 'wb') as corpus_file:
+                    corpus_file.write(data + record)
+            else:
+                with open(self.file_path, 'r+b') as corpus_file:
+                    corpus_file.truncate(len(data)) # drops a half-written record
+                    corpus_file.seek(len(data))
+                    corpus_file.write(record)
+            self._index(data + record)
+        return True
+
+
+    def random(self):
+        # a random quote or None if corpus is empty
+        import random
+        if not len(self):
+            return None
+        return self[random.randrange(len(self))]
+
+
+    def of_day(self, date):
+        # a quote which is same for date, or None if corpus is empty
+        if not len(self):
+            return None
+        day = str(date)
+        offset = self._offset_of_day(day)
+        if offset == None:
+            with FileLock(self.file_path + '.lock'):
+                offset = self._offset_of_day(day) # another process may have chosen it
+                if offset == None:
+                    seed = hashlib.sha1(str(date.toordinal()).encode('utf-8')).digest()
+                    offset = int.from_bytes(seed[:4], 'little') % len(self)
+                    write_atomic(self.file_path + '.day', '{}\n{}'.format(day, offset))
+        return self[offset]
+
+
+    def _offset_of_day(self, day):
+        # offset of quote which is chosen for day, or None
+        try:
+            with open(self.file_path + '.day', encoding='utf-8') as day_file:
+                (chosen_day, offset) = day_file.read().split('\n')
+            offset = int(offset)
+        except (OSError, ValueError):
+            return None
+        if chosen_day != day or not 0 <= offset < len(self):
+            return None
+        return offset
+
+
+def _payload(quote):
+    return ((quote.author or '') + '\0' + quote.text).encode('utf-8')
+
+
+def _digest(payload):
+    return hashlib.sha1(payload).digest()[:8]
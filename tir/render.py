@@ -0,0 +1,209 @@
+from .calendars import month_calendars, SOLAR_MONTH_NAMES
+
+
+# Renders transformers' data to text. Each block (dates, time or calendar) is
+#  built in one string, so it's written to terminal at once instead of a write
+#  for each part of it. theme is CalendarTheme, DateTheme or TimeTheme, None
+#  means no colors.
+
+# Themes are compiled once to tables of ready strings:
+#  calendar: each Day is classified to a style code (today, disabled and
+#   holiday bits) and each code has its painted parts of the five rows of a
+#   day, so a week is rendered by joining parts of its codes.
+#  date: a format string for each season.
+#  time: format strings with and without seconds.
+# Compiled tables are kept for each theme, None is a theme without colors.
+
+_TODAY    = 4
+_DISABLED = 2
+_HOLIDAY  = 1
+
+_CALENDAR_HEADER = (('normal',  ' ________  ________  ________  ________  ________  ________ ')
+                   ,('holiday', ' ________\n')
+                   ,('normal',  '| Shanbe ||  Yek   ||   Do   ||   Se   || Chahar ||  Panj  |')
+                   ,('holiday', '| Jom\'eh |\n'))
+
+_compiled = {}
+
+
+def day_code(day):
+    return (day.is_today and _TODAY) | (day.is_disabled and _DISABLED) | (day.is_holiday and _HOLIDAY)
+
+
+def compile_calendar_theme(theme):
+    # returns (header, {code: (top, empty, number, numbers, bottom)}) which
+    #  number and numbers are %-format strings of solar and (qamari, gregorian)
+    #  day numbers of day
+    key = ('calendar', theme)
+    try:
+        return _compiled[key]
+    except KeyError:
+        pass
+    except TypeError: # theme has lists, it's compiled each time
+        key = None
+
+    def paint(text, name):
+        if theme:
+            (start, stop) = getattr(theme, name)
+            return start + text + stop
+        return text
+
+    def escape(text):
+        return text.replace('%', '%%')
+
+    def value(name): # a painted %s
+        if theme:
+            (start, stop) = getattr(theme, name)
+            return escape(start) + '%s' + escape(stop)
+        return '%s'
+
+    header = ''.join([paint(text, name) for (name, text) in _CALENDAR_HEADER])
+    rows = {}
+    for code in range(8):
+        (is_today, is_disabled, is_holiday) = (code & _TODAY, code & _DISABLED, code & _HOLIDAY)
+        frame = 'normal'
+        if is_today:
+            frame = 'today'
+        elif is_disabled:
+            frame = 'disabled'
+        elif is_holiday:
+            frame = 'holiday'
+        # frame and solar day number:
+        if is_today and is_holiday:
+            (type1, type2) = ('today', 'holiday')
+        elif is_today:
+            (type1, type2) = ('today', 'solar')
+        elif is_disabled and is_holiday:
+            (type1, type2) = ('disabled', 'holiday')
+        elif is_disabled:
+            (type1, type2) = ('disabled', 'disabled')
+        elif is_holiday:
+            (type1, type2) = ('holiday', 'holiday')
+        else:
+            (type1, type2) = ('normal', 'normal')
+        number = escape(paint('|   ', type1)) + value(type2) + escape(paint('   |', type1))
+        # qamari and gregorian day numbers and frame:
+        if is_today:
+            (type1, type2) = ('other_days', 'today')
+        elif is_disabled:
+            (type1, type2) = ('disabled', 'disabled')
+        elif is_holiday:
+            (type1, type2) = ('other_days', 'holiday')
+        else:
+            (type1, type2) = ('other_days', 'normal')
+        numbers = escape(paint('| ', type2)) + value(type1) + escape(paint('  ', 'normal')) + \
+                  value(type1) + escape(paint(' |', type2))
+        rows[code] = (paint(' ' + ('_' * 8) + ' ', frame)
+                     ,paint('|' + (' ' * 8) + '|', frame)
+                     ,number
+                     ,numbers
+                     ,paint('|' + ('_' * 8) + '|', frame))
+    if key:
+        _compiled[key] = (header, rows)
+    return (header, rows)
+
+
+def render_calendar(days, theme=None):
+    (header, rows) = compile_calendar_theme(theme)
+    count = 35
+    if len(days) == 42:
+        count = 42
+    codes = [rows[day_code(day)] for day in days[:count]]
+    parts = [header]
+    for offset in range(0, count, 7):
+        week = days[offset:offset + 7]
+        week_rows = codes[offset:offset + 7]
+        parts.append(''.join([row[0] for row in week_rows]) + '\n')
+        parts.append(''.join([row[1] for row in week_rows]) + '\n')
+        parts.append(''.join([row[2] % day.solar for (row, day) in zip(week_rows, week)]) + '\n')
+        parts.append(''.join([row[3] % (day.qamari, day.gregorian)
+                              for (row, day) in zip(week_rows, week)]) + '\n')
+        parts.append(''.join([row[4] for row in week_rows]) + '\n')
+    return ''.join(parts)
+
+
+def render_months(months, theme=None, store=None, today=None, title=True):
+    # yields rendered calendar of each solar (year, month) of months, e.g.
+    #  render_months([(1397, month) for month in range(1, 13)]) for a year.
+    # Calendar of a month is read from store (a CalendarStore) if it's
+    #  there, otherwise it's computed and only Fridays are holidays.
+    # today is solar (year, month, day) which should be marked.
+    title_format = '{:^70}\n'
+    if theme:
+        (start, stop) = theme.normal
+        title_format = start + title_format[:-1] + stop + '\n'
+    for (year, month, days) in month_calendars(months, store, today):
+        text = render_calendar(days, theme)
+        if title:
+            text = title_format.format('{} {}'.format(SOLAR_MONTH_NAMES[month - 1], year)) + text
+        yield text
+
+
+def compile_date_theme(theme):
+    # returns a format string for each season
+    key = ('date', theme)
+    try:
+        return _compiled[key]
+    except KeyError:
+        pass
+    except TypeError: # theme has lists, it's compiled each time
+        key = None
+
+    def paint(text, item):
+        if theme:
+            (start, stop) = item
+            return start.replace('{', '{{').replace('}', '}}') + text + \
+                   stop.replace('{', '{{').replace('}', '}}')
+        return text
+
+    formats = []
+    for season in range(4):
+        formats.append(''.join([paint('{weekday:^10}', theme and theme.weekday)
+                               ,' '
+                               ,paint('{day}', theme and theme.day)
+                               ,paint('{month_name:^13}', theme and theme.month_name)
+                               ,'('
+                               ,paint('{month}', theme and theme.month)
+                               ,') '
+                               ,paint('{year}', theme and theme.year)
+                               ,' '
+                               ,paint('{season_name:^10}', theme and theme.seasons[season])]))
+    if key:
+        _compiled[key] = formats
+    return formats
+
+
+def render_date(date, theme=None):
+    # e.g. '4-Shanbeh  09    Aban     (08) 1397   Pa'eez  '
+    return compile_date_theme(theme)[int(date.season) - 1].format(**date._asdict())
+
+
+def compile_time_theme(theme):
+    # returns format strings (without seconds, with seconds)
+    key = ('time', theme)
+    try:
+        return _compiled[key]
+    except KeyError:
+        pass
+    except TypeError: # theme has lists, it's compiled each time
+        key = None
+
+    def paint(text, item):
+        if theme:
+            (start, stop) = item
+            return start.replace('%', '%%') + text + stop.replace('%', '%%')
+        return text
+
+    without_seconds = paint('%s', theme and theme.hour) + ':' + paint('%s', theme and theme.minute)
+    formats = (without_seconds, without_seconds + ':' + paint('%s', theme and theme.second))
+    if key:
+        _compiled[key] = formats
+    return formats
+
+
+def render_time(time, theme=None):
+    # e.g. '21:04:03'
+    (without_seconds, with_seconds) = compile_time_theme(theme)
+    if time.second:
+        return with_seconds % time
+    return without_seconds % time[:2]
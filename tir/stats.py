@@ -0,0 +1,106 @@
+import json
+import time
+import threading
+
+
+# Timers and counters of stages of a run (fetch, parse, each transformer,
+#  cache, render, notify), for finding where time is spent. They do nothing
+#  until stats.enabled is set, and can be used from several threads:
+#
+#   stats.enabled = True
+#   with stats.timer('parse'):
+#       ...
+#   stats.count('bytes', len(chunk))
+#   print(stats.report())
+
+class Stats:
+
+    def __init__(self):
+        self.enabled = False
+        self.timers = {}   # name -> [calls, seconds]
+        self.counters = {} # name -> value
+        self._noop = _NoopTimer()
+        self._lock = threading.Lock()
+
+
+    def reset(self):
+        self.timers = {}
+        self.counters = {}
+
+
+    def timer(self, name):
+        if not self.enabled:
+            return self._noop
+        return _Timer(self, name)
+
+
+    def add_time(self, name, seconds, calls=1):
+        if self.enabled:
+            with self._lock:
+                timer = self.timers.setdefault(name, [0, 0.0])
+                timer[0] += calls
+                timer[1] += seconds
+
+
+    def count(self, name, value=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + value
+
+
+    def report(self):
+        # a table of timers in order they were started and then counters
+        lines = ['{:<28}{:>8}{:>12}'.format('stage', 'calls', 'ms')]
+        for name, (calls, seconds) in self.timers.items():
+            lines.append('{:<28}{:>8}{:>12.2f}'.format(name, calls, seconds * 1000))
+        for name, value in self.counters.items():
+            lines.append('{:<28}{:>20}'.format(name, value))
+        return '\n'.join(lines) + '\n'
+
+
+    def record(self):
+        return {'time':     time.strftime('%Y-%m-%dT%H:%M:%S')
+               ,'timers':   {name: {'calls': calls, 'ms': round(seconds * 1000, 3)}
+                             for name, (calls, seconds) in self.timers.items()}
+               ,'counters': dict(self.counters)}
+
+
+    def write_record(self, file_path):
+        # appends record() to file as a line of JSON
+        with open(file_path, 'a', encoding='utf-8') as record_file:
+            record_file.write(json.dumps(self.record(), separators=(',', ':')) + '\n')
+
+
+class _Timer:
+
+    __slots__ = ('stats', 'name', 'start')
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+        self.start = None
+
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+
+    def __exit__(self, *args):
+        self.stats.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoopTimer:
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        return False
+
+
+stats = Stats()
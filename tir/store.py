@@ -0,0 +1,238 @@
+import os
+import mmap
+import time
+import struct
+from .tir import Day
+from .month import Month, DISABLED as _DISABLED, HOLIDAY as _HOLIDAY
+from .cache import write_atomic, FileLock
+
+
+# An on-disk store of calendar grids (list of Day tuples which find_calendar
+#  returns) keyed by solar year and month.
+# File starts with a header and then has one fixed-width block per month:
+#  block header: year, month, number of cells, offset of day 1 in cells
+#  42 cells:     flags (disabled/holiday), solar, gregorian and qamari day
+# File is accessed via mmap and position of each month's block is kept in an
+#  index, so reading any day or month does not read or parse anything else.
+# A month which is put again is written in its block in place. Header has a
+#  generation number which every put changes, and which is odd while a block
+#  is being written; readers read a block again if generation is odd or is
+#  changed while they read it, so they do not see a half-written block.
+#  Generation also tells others (e.g. HolidayIndex) that store is changed.
+
+_STORE_MAGIC = b'TIRC'
+_STORE_VERSION = 2
+_STORE_HEADER = struct.Struct('<4sBI') # magic, version, generation
+_GENERATION = struct.Struct('<I')
+_GENERATION_OFFSET = 5
+_READ_RETRIES = 100
+_BLOCK_HEADER = struct.Struct('<HBBB')
+_CELL = struct.Struct('<BBBB')
+_CELLS = 42
+BLOCK_SIZE = _BLOCK_HEADER.size + _CELLS * _CELL.size
+
+
+class CalendarStore:
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.index = {} # (year, month) -> offset of its block
+        self._file = None
+        self._map = None
+        self.open()
+
+
+    def open(self):
+        if not self._open():
+            # store is new or of another version, it's created under the lock
+            #  which put takes, so it does not replace months which another
+            #  process is putting
+            with FileLock(self.file_path + '.lock'):
+                self._open_locked()
+
+
+    def _open_locked(self):
+        if not self._open(): # or another process has created it meanwhile
+            self._create()
+            self._open()
+
+
+    def _open(self):
+        # opens and indexes store, returns False if it's missing or of another
+        #  version
+        try:
+            self._file = open(self.file_path, 'r+b')
+        except FileNotFoundError:
+            return False
+        if os.fstat(self._file.fileno()).st_size < _STORE_HEADER.size:
+            self._file.close()
+            self._file = None
+            return False
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        if _STORE_HEADER.unpack_from(self._map)[:2] != (_STORE_MAGIC, _STORE_VERSION):
+            self.close()
+            return False
+        self.index = {}
+        offset = _STORE_HEADER.size
+        while offset + BLOCK_SIZE <= self._map.size():
+            (year, month, _, _) = _BLOCK_HEADER.unpack_from(self._map, offset)
+            self.index[(year, month)] = offset
+            offset += BLOCK_SIZE
+        return True
+
+
+    def _create(self):
+        write_atomic(self.file_path, _STORE_HEADER.pack(_STORE_MAGIC, _STORE_VERSION, 0))
+
+
+    def close(self):
+        if self._map != None:
+            self._map.close()
+            self._file.close()
+        (self._map, self._file) = (None, None)
+
+
+    def __contains__(self, year_month):
+        return (int(year_month[0]), int(year_month[1])) in self.index
+
+
+    def months(self):
+        return sorted(self.index)
+
+
+    def generation(self):
+        return _GENERATION.unpack_from(self._map, _GENERATION_OFFSET)[0]
+
+
+    def signature(self):
+        # (inode, size, generation) of file after indexing months which other
+        #  processes have added, it changes whenever store changes. Generation
+        #  is read first, so a put meanwhile is not missed.
+        generation = self.generation()
+        self.refresh()
+        return (os.fstat(self._file.fileno()).st_ino, self._map.size(), generation)
+
+
+    def _set_generation(self, generation):
+        _GENERATION.pack_into(self._map, _GENERATION_OFFSET, generation & 0xffffffff)
+
+
+    def put(self, year, month, days):
+        (year, month) = (int(year), int(month))
+        if len(days) > _CELLS:
+            raise ValueError('calendar with {} days is too long'.format(len(days)))
+        first_day = 0
+        for offset, day in enumerate(days):
+            if not day.is_disabled:
+                first_day = offset
+                break
+        block = bytearray(BLOCK_SIZE)
+        _BLOCK_HEADER.pack_into(block, 0, year, month, len(days), first_day)
+        offset = _BLOCK_HEADER.size
+        for day in days:
+            flags = 0
+            if day.is_disabled:
+                flags |= _DISABLED
+            if day.is_holiday:
+                flags |= _HOLIDAY
+            _CELL.pack_into(block
+                           ,offset
+                           ,flags
+                           ,int(day.solar)
+                           ,int(day.gregorian)
+                           ,int(day.qamari))
+            offset += _CELL.size
+        # other processes may write to store too, their months are indexed
+        #  before writing this one:
+        with FileLock(self.file_path + '.lock'):
+            self._refresh(self._open_locked)
+            self._put(year, month, block)
+
+
+    def refresh(self):
+        # indexes months which other processes have added since it's opened,
+        #  or opens store again if another process has replaced it (e.g. by
+        #  another version of store), instead of reading the removed file
+        self._refresh(self.open)
+
+
+    def _refresh(self, reopen):
+        status = os.fstat(self._file.fileno())
+        try:
+            replaced = os.stat(self.file_path).st_ino != status.st_ino
+        except FileNotFoundError:
+            replaced = True
+        if replaced or status.st_size != self._map.size():
+            self.close()
+            reopen()
+
+
+    def _put(self, year, month, block):
+        writing = self.generation() | 1
+        if (year, month) in self.index: # updates it in place
+            offset = self.index[(year, month)]
+            self._set_generation(writing)
+            self._map[offset:offset + BLOCK_SIZE] = block
+        else:
+            self._map.close()
+            self._file.seek(0, os.SEEK_END)
+            offset = self._file.tell()
+            self._file.write(block)
+            self._file.flush()
+            self._map = mmap.mmap(self._file.fileno(), 0)
+            self.index[(year, month)] = offset
+        self._set_generation(writing + 1)
+        self._map.flush()
+
+
+    def _read(self, offset, size):
+        # bytes of store which no process is writing, see generation
+        for _ in range(_READ_RETRIES):
+            generation = self.generation()
+            data = self._map[offset:offset + size]
+            if not generation & 1 and self.generation() == generation:
+                return data
+            time.sleep(0.001)
+        return data # a process has stopped while writing
+
+
+    def month(self, year, month, today=None):
+        # returns calendar of month as a Month or None if it's not stored.
+        # today is solar day number of month which should be marked as today
+        offset = self.index.get((int(year), int(month)))
+        if offset == None:
+            return None
+        block = self._read(offset, BLOCK_SIZE)
+        (_, _, count, first_day) = _BLOCK_HEADER.unpack_from(block)
+        today_offset = None
+        if today != None:
+            today_offset = first_day + int(today) - 1
+        return Month.from_cells(block[_BLOCK_HEADER.size:_BLOCK_HEADER.size + count * _CELL.size]
+                               ,today_offset)
+
+
+    def day(self, year, month, day, is_today=False):
+        # returns Day of a solar date or None if its month is not stored
+        offset = self.index.get((int(year), int(month)))
+        if offset == None:
+            return None
+        block = self._read(offset, BLOCK_SIZE)
+        (_, _, count, first_day) = _BLOCK_HEADER.unpack_from(block)
+        cell_offset = first_day + int(day) - 1
+        if not 0 <= cell_offset < count:
+            raise ValueError('unknown day {!r} in {}/{}'.format(day, year, month))
+        cell = _CELL.unpack_from(block, _BLOCK_HEADER.size + cell_offset * _CELL.size)
+        if cell[0] & _DISABLED:
+            raise ValueError('unknown day {!r} in {}/{}'.format(day, year, month))
+        return self._day(cell, is_today)
+
+
+    def _day(self, cell, is_today):
+        (flags, solar, gregorian, qamari) = cell
+        is_disabled = bool(flags & _DISABLED)
+        return Day(is_disabled
+                  ,is_today and not is_disabled
+                  ,bool(flags & _HOLIDAY)
+                  ,'{:02d}'.format(solar)
+                  ,'{:02d}'.format(gregorian)
+                  ,'{:02d}'.format(qamari))
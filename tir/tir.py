@@ -1,6 +1,9 @@
-import requests
-import lxml.html
 from collections import namedtuple
+import threading
+from .stats import stats
+
+# requests, lxml and asyncio are imported where they are used, so importing
+#  tir for cached data does not pay for importing them.
 
 
 # named tuples:
@@ -90,18 +93,10 @@ def transform_date_with_string_month(date):
 def transform_weekday(weekday):
     if len(weekday) < 4: # shorter weekdays are شنبه or جمعه
         raise ValueError('unknown weekday {!r}'.format(weekday))
-    farsi_weekdays_table = [('Shanbeh',   1588)  # ش
-                           ,('1-Shanbeh', 1740)  # ی
-                           ,('2-Shanbeh', 1583)  # د
-                           ,('3-Shanbeh', 1587)  # س
-                           ,('4-Shanbeh', 1670)  # چ
-                           ,('5-Shanbeh', 1662)  # پ
-                           ,('Jom\'eh',   1580)] # ج
-    weekday_char1_unicode_number = ord(weekday[0])
-    for farsi_weekday, char1_unicode_number in farsi_weekdays_table:
-        if weekday_char1_unicode_number == char1_unicode_number:
-            return farsi_weekday
-    raise ValueError('unknown weekday {!r}'.format(weekday))
+    try:
+        return _FARSI_WEEKDAYS[weekday[0]]
+    except KeyError:
+        raise ValueError('unknown weekday {!r}'.format(weekday))
 
 
 def find_season(month_number, _type):
@@ -134,96 +129,189 @@ def find_season(month_number, _type):
 
 
 def transform_number(number):
-    number2 = ''
-    for char in number:
-        unicode_number = ord(char)
-        if 1775 < unicode_number < 1786: # ۰-۹ farsi
-            number2 += chr(unicode_number - 1728) # transform farsi ۰-۹ to 0-9
-            continue
-        if 1631 < unicode_number < 1642: # ۰-۹ arabic
-            number2 += chr(unicode_number - 1584) # transform arabic ۰-۹ to 0-9
-            continue
-        if 47 < ord(char) < 58: # 0-9
-            number2 += char
-            continue
+    try:
+        return _TRANSFORMED_NUMBERS[number]
+    except KeyError:
+        pass
+    number2 = number.translate(_FARSI_DIGITS)
+    if number2.strip(_DIGITS): # it has other characters than digits
         raise ValueError('unknown farsi number {!r}'.format(number))
     if len(number2) == 1:
         number2 = '0' + number2
     return number2
 
 
+def transform_numbers(numbers):
+    # bulk version of transform_number() for a list of numbers
+    try:
+        return [_TRANSFORMED_NUMBERS[number] for number in numbers]
+    except KeyError: # e.g. a year
+        return [transform_number(number) for number in numbers]
+
+
 def transform_month(month):
     if len(month) < 2: # Solar months shoudl contain at least 2 characterss
         raise ValueError('unknown solar-hijri month {!r}'.format(month))
-    farsi_month_table = [('Farvardin',   (1601, None))  # ف
-                        ,('Ordibehesht', (1575, 1585))  # ار
-                        ,('Khordad',     (1582, None))  # خ
-                        ,('Tir',         (1578, None))  # ت
-                        ,('Mordad',      (1605, 1585))  # مر
-                        ,('Mordad',      (1575, 1614))  # اَ
-                        ,('Shahrivar',   (1588, None))  # ش
-                        ,('Mehr',        (1605, 1607))  # مه
-                        ,('Aban',        (1575, 1576))  # اب
-                        ,('Azar',        (1575, 1584))  # اذ
-                        ,('Dey',         (1583, None))  # د
-                        ,('Bahman',      (1576, None))  # ب
-                        ,('Esfand',      (1575, 1587))] # اس
-    (char1_number, char2_number) = (ord(month[0]), ord(month[1]))
-    if char1_number == 1570:
-        char1_number = 1575 # transform آ to ا (A without hat :D)
-    for name, char_numbers in farsi_month_table:
-        if char_numbers[0] == char1_number:
-            if (not char_numbers[1] or char_numbers[1] == char2_number):
-                return name
-    raise ValueError('unknown solar month {!r}'.format(month))
+    key = month[:2]
+    if key[0] == 'آ':
+        key = 'ا' + key[1] # transform آ to ا (A without hat :D)
+    name = _FARSI_MONTHS.get(key) or _FARSI_MONTHS.get(key[0])
+    if name == None:
+        raise ValueError('unknown solar month {!r}'.format(month))
+    return name
 
 
 def is_a_to_z(data):
-    for char in data:
-        number = ord(char)
-        if 96 < number < 123: # a-z
-            continue
-        if 64 < number < 91:  # A-Z
-            continue
-        return False
-    return True
+    return _A_TO_Z.issuperset(data)
+
+# tables of above functions:
+
+_DIGITS = '0123456789'
+_A_TO_Z = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
+
+# farsi ۰-۹ and arabic ٠-٩ to 0-9:
+_FARSI_DIGITS = str.maketrans('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩', _DIGITS * 2)
+
+# transformed numbers of one or two farsi, arabic or english digits (e.g. all
+#  days), others are translated with above table:
+_TRANSFORMED_NUMBERS = {}
+for _digits in ('۰۱۲۳۴۵۶۷۸۹', '٠١٢٣٤٥٦٧٨٩', _DIGITS):
+    for _offset in range(10):
+        _TRANSFORMED_NUMBERS[_digits[_offset]] = '0' + _DIGITS[_offset]
+        for _offset2 in range(10):
+            _TRANSFORMED_NUMBERS[_digits[_offset] + _digits[_offset2]] = _DIGITS[_offset] + _DIGITS[_offset2]
+del _digits, _offset, _offset2
+
+# first character of weekday:
+_FARSI_WEEKDAYS = {'ش': 'Shanbeh'
+                  ,'ی': '1-Shanbeh'
+                  ,'د': '2-Shanbeh'
+                  ,'س': '3-Shanbeh'
+                  ,'چ': '4-Shanbeh'
+                  ,'پ': '5-Shanbeh'
+                  ,'ج': 'Jom\'eh'}
+
+# first character, or first two characters for months which start with the
+#  same character:
+_FARSI_MONTHS = {'ف':  'Farvardin'
+                ,'ار': 'Ordibehesht'
+                ,'خ':  'Khordad'
+                ,'ت':  'Tir'
+                ,'مر': 'Mordad'
+                ,'اَ': 'Mordad'
+                ,'ش':  'Shahrivar'
+                ,'مه': 'Mehr'
+                ,'اب': 'Aban'
+                ,'اذ': 'Azar'
+                ,'د':  'Dey'
+                ,'ب':  'Bahman'
+                ,'اس': 'Esfand'}
 
 # search funcion and its utilities which used for parsed HTML page:
 
 def search(element, tag, attr, val):
-    def _has_attr(sub_element):
-        for attr2, val2 in sub_element.attrib.items():
-            if type(attr) == tuple and type(val) == tuple:
-                if attr2.find(attr[0]) != -1 and val2.find(val[0]) != -1:
-                    return True
-            elif type(attr) == tuple:
-                if attr2.find(attr[0]) != -1 and val2 == val:
-                    return True
-            elif type(val) == tuple:
-                if attr2 == attr and val2.find(val[0]) != -1:
-                    return True
-            else:
-                if attr2 == attr and val2 == val:
+    return Selector(tag, attr, val).first(element)
+
+# A compiled (tag, attr, val) pattern.
+# attr and val may be strings for exact matching or 1-sized tuples for
+#  substring matching, for example Selector('div', 'class', ('todayDate',))
+#  matches a <div> which its class contains 'todayDate'.
+# Each pattern is compiled once to an XPath expression which is evaluated by
+#  libxml2 itself instead of walking the tree in Python.
+
+class Selector:
+
+    _compiled = {}
+
+    def __init__(self, tag, attr=None, val=None):
+        self.tag = tag
+        self.attr = attr
+        self.val = val
+        self._xpath = None
+        self.variables = {}
+        if type(attr) == tuple:
+            self.variables['attr'] = attr[0]
+        if attr != None:
+            self.variables['val'] = val[0] if type(val) == tuple else val
+
+
+    @property
+    def xpath(self):
+        # compiled on first use
+        if self._xpath == None:
+            # values are XPath variables, so path only depends on shape of
+            #  pattern and is shared by selectors with other values
+            key = (self.tag
+                  ,tuple if type(self.attr) == tuple else self.attr
+                  ,type(self.val) == tuple)
+            if key not in self._compiled:
+                import lxml.etree
+                self._compiled[key] = lxml.etree.XPath(self._path())
+            self._xpath = self._compiled[key]
+        return self._xpath
+
+
+    def _path(self):
+        # first matching descendant in document order
+        if self.attr == None:
+            return 'descendant::{}[1]'.format(self.tag)
+        if type(self.attr) == tuple:
+            attr = '@*[contains(name(), $attr) and '
+        else:
+            attr = '@{}['.format(self.attr)
+        if type(self.val) == tuple:
+            val = 'contains(., $val)'
+        else:
+            val = '. = $val'
+        return 'descendant::{}[{}{}]][1]'.format(self.tag, attr, val)
+
+
+    def match(self, element):
+        # checks element itself, used where tree is not complete yet
+        if element.tag != self.tag:
+            return False
+        if self.attr == None:
+            return True
+        for attr2, val2 in element.items():
+            if type(self.attr) == tuple:
+                if attr2.find(self.attr[0]) == -1:
+                    continue
+            elif attr2 != self.attr:
+                continue
+            if type(self.val) == tuple:
+                if val2.find(self.val[0]) != -1:
                     return True
+            elif val2 == self.val:
+                return True
         return False
 
-    def _search(element, tag, attr, val):
-        for sub_element in element.getchildren():
-            if sub_element.tag == tag:
-                if attr == None:
-                    return sub_element
-                if _has_attr(sub_element):
-                    return sub_element
-            result = _search(sub_element, tag, attr, val)
-            if result == None:
-                continue
-            return result
-        return None
 
-    element = _search(element, tag, attr, val)
-    if element == None:
-        raise _TagNotFound(tag, attr, val)
-    return element
+    def first(self, element):
+        xpath = self._xpath or self.xpath
+        result = xpath(element, **self.variables)
+        if not result:
+            raise _TagNotFound(self.tag, self.attr, self.val)
+        return result[0]
+
+# Lookups of one parsed HTML page. HTMLParser and StreamingHTMLParser make
+#  one for each parse and give it to transformers of that page, so each
+#  (selector, element) pair (e.g. 'topWrapper' which all of them need) is
+#  searched only once, and it's dropped with the page.
+
+class SelectorIndex:
+
+    def __init__(self, root):
+        self.root = root
+        self.found = {}
+
+
+    def find(self, selector, element=None):
+        if element == None:
+            element = self.root
+        key = (selector, element)
+        if key not in self.found:
+            self.found[key] = selector.first(element)
+        return self.found[key]
 
 class _TagNotFound(Exception):
 
@@ -243,13 +331,27 @@ class _TagNotFound(Exception):
         Exception.__init__(self, text)
 
 # A class which makes request for fetching HTML page:
+# It keeps connections of a requests.Session alive between requests (e.g. for
+#  '/fa/main' after main page), each thread which uses it has its own session
+#  since a session is not thread-safe, every request has connect and read timeouts
+#  and body is compressed by server if it supports (gzip, or brotli if
+#  'brotli' package is installed).
+# validators maps each URL to its last 'etag' and 'last-modified' response
+#  headers, they are sent back to server in next request of that URL and if
+#  page is not changed, server answers with 304 and NotModified is raised.
+# MONTH_PATH is path of page of a solar month, formatted with year and month.
+
+MONTH_PATH = '/fa/main?year={year}&month={month}'
 
 class Request:
 
     def __init__(self
                 ,url='http://www.time.ir' #/fa/main'
                 ,user_agent = 'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:50.0) Gecko/20100101 Firefox/50.0'
-                ,headers = {'accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'}):
+                ,headers = {'accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'}
+                ,connect_timeout=5
+                ,read_timeout=10
+                ,validators=None):
         self.url = url
         for (key, _) in headers.items():
             if key.lower() == 'user-agent':
@@ -257,16 +359,221 @@ class Request:
         else:
             headers['user-agent'] = user_agent
         self.headers = headers
+        self.timeout = (connect_timeout, read_timeout)
+        self.validators = validators or {}
+        self._lock = threading.Lock() # of validators and _sessions
+        self._local = threading.local()
+        self._sessions = []
+
+
+    @property
+    def session(self):
+        # session of current thread
+        session = getattr(self._local, 'session', None)
+        if session == None:
+            with stats.timer('import.requests'):
+                import requests
+            session = requests.Session()
+            session.headers.update(self.headers)
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+
+    def close(self):
+        with self._lock:
+            (sessions, self._sessions) = (self._sessions, [])
+        for session in sessions:
+            session.close()
+
+
+    def _get(self, path, stream=False):
+        url = self.url + path
+        headers = {}
+        with self._lock:
+            validators = self.validators.get(url, {})
+        if validators.get('etag'):
+            headers['if-none-match'] = validators['etag']
+        if validators.get('last-modified'):
+            headers['if-modified-since'] = validators['last-modified']
+        with stats.timer('fetch'):
+            request = self.session.get(url, headers=headers, stream=stream, timeout=self.timeout)
+        stats.count('requests')
+        if request.status_code == 304:
+            request.close()
+            raise NotModified(url)
+        validators = {}
+        for header in ('etag', 'last-modified'):
+            if header in request.headers:
+                validators[header] = request.headers[header]
+        with self._lock:
+            self.validators[url] = validators
+        return request
 
 
     def get(self):
-        request = requests.get(self.url, headers=self.headers)
-        body = request.text
+        body = self._get('').text
         if len(body) < 36000:
-                request = requests.get(self.url + '/fa/main', headers=self.headers)
-                body = request.text
+                body = self._get('/fa/main').text
         return body
 
+
+    def get_month(self, year, month, path=MONTH_PATH):
+        return self._get(path.format(year=int(year), month=int(month))).text
+
+
+    def stream(self, path='', chunk_size=8192):
+        # yields body in chunks as it arrives, closing generator closes the
+        #  connection without reading rest of the body
+        request = self._get(path, stream=True)
+        try:
+            chunks = request.iter_content(chunk_size)
+            while True:
+                with stats.timer('download'):
+                    chunk = next(chunks, None)
+                if chunk == None:
+                    break
+                stats.count('bytes', len(chunk))
+                yield chunk
+        finally:
+            request.close()
+
+# A Request which is used from asyncio and fetches several pages at once.
+# Blocking requests of Request run in a pool of threads (each with its own
+#  session) and at most concurrency of them are running at the same time.
+
+class AsyncRequest:
+
+    def __init__(self
+                ,url='http://www.time.ir'
+                ,concurrency=4
+                ,month_path=MONTH_PATH
+                ,**kwargs):
+        import concurrent.futures
+        self.request = Request(url, **kwargs)
+        self.concurrency = concurrency
+        self.month_path = month_path
+        self.executor = concurrent.futures.ThreadPoolExecutor(concurrency)
+        self._semaphore = None
+
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.request.close()
+
+
+    async def get(self, path=''):
+        import asyncio
+        if self._semaphore == None: # should be made in running event loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(self.executor, self._get_text, path)
+
+
+    def _get_text(self, path):
+        return self.request._get(path).text
+
+
+    async def get_page(self, parse=None, paths=('', '/fa/main')):
+        # same as Request.get() but '/fa/main' is fetched at the same time
+        #  with main page instead of after it. parse(body) is called with body
+        #  (bytes) of each page as it arrives and its result for the first
+        #  page which it accepts is returned, then other request is cancelled.
+        #  By default parse checks page is as long as Request.get() expects
+        #  and returns body. If parse raises (e.g. _TagNotFound) or request of
+        #  a page fails, other page is waited for, and if it fails too, its
+        #  error is raised. NotModified of a page is raised at once.
+        # Requests run in daemon threads, so a cancelled request which is
+        #  still waiting for server does not keep the process alive.
+        import asyncio
+        if parse == None:
+            parse = _complete_page
+        cancelled = threading.Event()
+        tasks = [asyncio.ensure_future(self._race(path, cancelled)) for path in paths]
+        error = None
+        try:
+            pending = set(tasks)
+            while pending:
+                (done, pending) = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in [task for task in tasks if task in done]:
+                    try:
+                        return parse(task.result())
+                    except NotModified:
+                        raise
+                    except Exception as exception:
+                        error = exception
+            raise error
+        finally:
+            cancelled.set()
+            for task in tasks:
+                task.cancel()
+
+
+    async def _race(self, path, cancelled):
+        import asyncio
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+
+        def resolve(result, exception):
+            if not future.done():
+                if exception != None:
+                    future.set_exception(exception)
+                else:
+                    future.set_result(result)
+
+        def run():
+            (result, exception) = (None, None)
+            try:
+                result = self._get_body(path, cancelled)
+            except Exception as error:
+                exception = error
+            try:
+                loop.call_soon_threadsafe(resolve, result, exception)
+            except RuntimeError: # loop is closed, nobody waits for it
+                pass
+
+        threading.Thread(target=run, daemon=True).start()
+        return await future
+
+
+    def _get_body(self, path, cancelled):
+        # body of page, or None once cancelled is set
+        response = self.request._get(path, stream=True)
+        try:
+            data = []
+            for chunk in response.iter_content(8192):
+                if cancelled.is_set():
+                    stats.count('requests.cancelled')
+                    return None
+                data.append(chunk)
+        finally:
+            response.close()
+        return b''.join(data)
+
+
+    async def get_many(self, paths):
+        import asyncio
+        return await asyncio.gather(*[self.get(path) for path in paths])
+
+
+    async def get_months(self, months):
+        # months is a list of (solar year, month), returns their pages in order
+        paths = [self.month_path.format(year=int(year), month=int(month))
+                 for (year, month) in months]
+        return await self.get_many(paths)
+
+def _complete_page(body):
+    if len(body) < 36000:
+        raise ValueError('page is not complete')
+    return body
+
+class NotModified(Exception):
+
+    def __init__(self, url):
+        Exception.__init__(self, '{!r} is not modified'.format(url))
+
 # An HTML parser which accepts some transformers, and after parsing HTML
 #  page, runs each transformer with parsed data
 
@@ -274,11 +581,127 @@ class Request:
 class HTMLParser:
     
     def __init__(self, text, transformers):
-        self.html = lxml.html.fromstring(text)
+        with stats.timer('import.lxml'):
+            import lxml.html
+        with stats.timer('parse'):
+            self.html = lxml.html.fromstring(text)
+        self.index = SelectorIndex(self.html)
         self.transformers = transformers
 
     def parse(self):
+        # each transformer is called with parsed page and its SelectorIndex
         transform_data = {}
         for name, transformer in self.transformers.items():
-            transform_data[name] = transformer(self.html)
+            with stats.timer('transform.' + name):
+                transform_data[name] = transformer(self.html, self.index)
         return transform_data
+
+# An HTML parser which is fed by chunks of page as they arrive and only keeps
+#  subtrees which transformers need. subtrees maps each transformer to a
+#  Selector of the part of page it needs, as soon as that part is closed its
+#  transformer runs. When all subtrees are closed, it stops reading chunks.
+# Elements with the same tag as those selectors are cleared as soon as they
+#  are closed unless they are in or contain a needed subtree, so transformers
+#  can find needed parts as they do in complete page.
+
+class StreamingHTMLParser:
+
+    def __init__(self, chunks, transformers, subtrees, encoding=None, previous=None):
+        with stats.timer('import.lxml'):
+            import lxml.etree
+            import lxml.html
+        self.chunks = chunks
+        self.transformers = transformers
+        self.subtrees = subtrees
+        # previous maps names of transformers to (hash of subtree, data) of an
+        #  earlier parse (see hashes). A transformer which its subtree has same
+        #  hash is not run again and its earlier data is used.
+        self.previous = previous or {}
+        self.hashes = {} # name -> hash of subtree which transformer needed
+        tags = set([selector.tag for selector in subtrees.values()])
+        self.parser = lxml.etree.HTMLPullParser(events=('start', 'end')
+                                               ,tag=tags
+                                               ,encoding=encoding)
+        self.parser.set_element_class_lookup(lxml.html.HtmlElementClassLookup())
+        self.html = None
+
+
+    def parse(self):
+        # chunks (e.g. a streamed response) are closed once page is parsed or
+        #  parsing fails, without reading rest of them
+        try:
+            return self._parse()
+        finally:
+            if hasattr(self.chunks, 'close'):
+                self.chunks.close()
+
+
+    def _parse(self):
+        transform_data = {}
+        remaining = {} # selector -> names of transformers which need it
+        for name, transformer in self.transformers.items():
+            if transformer in self.subtrees:
+                remaining.setdefault(self.subtrees[transformer], []).append(name)
+        index = None   # SelectorIndex of page which is shared by transformers
+        subtree = None # root of needed subtree which is not closed yet
+        waiting = []   # names of transformers which need subtree
+        stack = []     # [element, contains_subtree] for open elements
+        for chunk in self.chunks:
+            with stats.timer('parse'):
+                self.parser.feed(chunk)
+            for event, element in self.parser.read_events():
+                if subtree != None:
+                    if event == 'end' and element is subtree:
+                        self.html = element.getroottree().getroot()
+                        with stats.timer('hash'):
+                            digest = subtree_hash(element)
+                        for name in waiting:
+                            self.hashes[name] = digest
+                            if name in self.previous and self.previous[name][0] == digest:
+                                stats.count('transform.reused')
+                                transform_data[name] = self.previous[name][1]
+                                continue
+                            index = self._index(index)
+                            with stats.timer('transform.' + name):
+                                transform_data[name] = self.transformers[name](self.html, index)
+                        (subtree, waiting) = (None, [])
+                    continue
+                if event == 'start':
+                    for selector in remaining:
+                        if selector.match(element):
+                            (subtree, waiting) = (element, remaining.pop(selector))
+                            for item in stack:
+                                item[1] = True
+                            break
+                    else:
+                        stack.append([element, False])
+                    continue
+                # event == 'end'
+                (element, contains_subtree) = stack.pop()
+                if not contains_subtree:
+                    element.clear()
+            if not remaining and subtree == None:
+                break
+        with stats.timer('parse'):
+            self.html = self.parser.close()
+        for name, transformer in self.transformers.items():
+            if name not in transform_data:
+                index = self._index(index)
+                with stats.timer('transform.' + name):
+                    transform_data[name] = transformer(self.html, index)
+        return transform_data
+
+
+    def _index(self, index):
+        # SelectorIndex of this parse, which is made again if root of page
+        #  is changed
+        if index == None or index.root is not self.html:
+            return SelectorIndex(self.html)
+        return index
+
+
+def subtree_hash(element):
+    # hash of HTML of an element and its children
+    import hashlib
+    import lxml.etree
+    return hashlib.sha1(lxml.etree.tostring(element)).hexdigest()[:16]
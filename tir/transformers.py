@@ -0,0 +1,118 @@
+from .tir import *
+
+
+# compiled selectors for parts of time.ir page which we need:
+
+TOP_WRAPPER        = Selector('div', 'class', 'topWrapper')
+TODAY_DATE         = Selector('div', 'class', ('todayDate',))
+DATE_ROWS          = Selector('div', 'class', 'row')
+DATE_TEXT          = Selector('span', 'class', 'show date')
+DATE_NUMERAL       = Selector('span', 'class', 'show numeral')
+DATE_ROW           = {'shamsi':    Selector('div', 'class', ('today-shamsi',))
+                     ,'gregorian': Selector('div', 'class', ('today-gregorian',))}
+CALENDAR_WRAPPER   = Selector('div', 'class', ('calendarWrapper',))
+CALENDAR_CONTAINER = Selector('div', 'id', ('CalendarContainer',))
+EVENT_CALENDAR     = Selector('div', 'class', 'eventCalendar')
+MAIN_CALENDAR      = Selector('div', 'class', 'mainCalendar')
+DAY_LIST           = Selector('div', 'class', 'dayList')
+DAY_JALALI         = Selector('div', 'class', ('jalali',))
+DAY_MILADI         = Selector('div', 'class', ('miladi',))
+DAY_QAMARI         = Selector('div', 'class', ('qamari',))
+RANDOM_QUOTE       = Selector('div', 'class', 'randomQuote')
+QUOTE_AUTHOR       = Selector('a', 'class', ('quoteAuthor',))
+QUOTE_TEXT         = Selector('span', 'class', ('quoteText',))
+
+# transformers which HTMLParser runs on parsed time.ir page.
+# All of them share SelectorIndex of the page which parser gives them, a new
+#  one is made if they are called without it.
+
+def find_dates(html, index=None):
+    if index == None:
+        index = SelectorIndex(html)
+    container_top = index.find(TOP_WRAPPER)
+    date = index.find(TODAY_DATE, container_top)
+    rows = index.find(DATE_ROWS, date)
+    solar = find_date(index, rows, 'shamsi')
+    gregorian = find_date(index, rows, 'gregorian')
+    return {'solar': solar, 'gregorian': gregorian}
+
+
+def find_date(index, rows, _type):
+    row = index.find(DATE_ROW[_type], rows)
+    date = index.find(DATE_TEXT, row).text
+    date_numeral = index.find(DATE_NUMERAL, row).text
+
+    (weekday, (year, month_name, day)) = transform_date(date)
+    (year, season, month, day) = transform_numeral_date(date_numeral)
+    (season_name, season_number) = season
+    return Date(year        = year
+               ,season      = season_number
+               ,season_name = season_name
+               ,month       = month
+               ,month_name  = month_name
+               ,day         = day
+               ,weekday     = weekday)
+
+
+def find_calendar(html, index=None):
+    if index == None:
+        index = SelectorIndex(html)
+    container_top = index.find(TOP_WRAPPER)
+    calendar_wrapper = index.find(CALENDAR_WRAPPER, container_top)
+    calendar_container = index.find(CALENDAR_CONTAINER, calendar_wrapper)
+    event_calendar = index.find(EVENT_CALENDAR, calendar_container)
+    main_calendar = index.find(MAIN_CALENDAR, event_calendar)
+    day_list = index.find(DAY_LIST, main_calendar)
+    # numbers of all days are transformed at once:
+    days = [_day_fields(day, index) for day in day_list if day.tag != 'br']
+    numbers = transform_numbers([number for fields in days for number in fields[3:]])
+    return [Day(*(fields[:3] + tuple(numbers[offset * 3:offset * 3 + 3])))
+            for offset, fields in enumerate(days)]
+
+
+def parse_day(day, index=None):
+    if day.tag == 'br':
+        return
+    if index == None:
+        index = SelectorIndex(day.getroottree().getroot())
+    fields = _day_fields(day, index)
+    return Day(*(fields[:3] + tuple([transform_number(number) for number in fields[3:]])))
+
+
+def _day_fields(day, index):
+    # flags and untransformed jalali, gregorian and qamari numbers of day
+    is_disabled = False
+    is_today = False
+    value = day.get('class')
+    if value != None:
+        if value.find('disabled') != -1:
+            is_disabled = True
+        elif value.find('today') != -1:
+            is_today = True
+    info = day[0]
+    is_holiday = False
+    value = info.get('class')
+    if value != None and value.find('holiday') != -1:
+        is_holiday = True
+    return (is_disabled
+           ,is_today
+           ,is_holiday
+           ,index.find(DAY_JALALI, info).text
+           ,index.find(DAY_MILADI, info).text
+           ,index.find(DAY_QAMARI, info).text)
+
+
+def find_quote(html, index=None):
+    if index == None:
+        index = SelectorIndex(html)
+    container_top = index.find(TOP_WRAPPER)
+    random_quote = index.find(RANDOM_QUOTE, container_top)
+    author = index.find(QUOTE_AUTHOR, random_quote).text
+    quote = index.find(QUOTE_TEXT, random_quote).text
+    return Quote(author, quote)
+
+# parts of time.ir page which above transformers need, for StreamingHTMLParser:
+
+SUBTREES = {find_dates:    TODAY_DATE
+           ,find_calendar: DAY_LIST
+           ,find_quote:    RANDOM_QUOTE}